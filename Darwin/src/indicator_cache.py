@@ -0,0 +1,41 @@
+import json
+import hashlib
+import threading
+
+class IndicatorCache:
+    """
+    The Memo Pad 🗒️. Remembers the last indicator frame per (symbol, timeframe).
+    Frames hold closed bars only: the forming candle is never cached, so a hit can't
+    serve stale prices. An entry stays valid while the last closed bar and the recipe
+    hash are unchanged, so the scan only recomputes when a new bar lands or the Coach
+    rewrites PARAMS / ACTIVE_CONCOCTION.
+    """
+    def __init__(self):
+        self.entries = {} # (symbol, timeframe) -> (closed_bar_time, recipe_hash, frame)
+        self.stats = {"hits": 0, "misses": 0}
+        self.lock = threading.Lock() # Scan threads read/write it concurrently
+
+    @staticmethod
+    def recipe_hash(state):
+        """Stable fingerprint of everything that shapes the indicator columns."""
+        blob = json.dumps({"recipe": state["ACTIVE_CONCOCTION"], "params": state["PARAMS"]}, sort_keys=True)
+        return hashlib.md5(blob.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def closed_bar_time(df):
+        """The newest bar that can no longer change (the last row is the forming candle)."""
+        return df['time'].iloc[-2] if len(df) > 1 else None
+
+    def get(self, symbol, timeframe, closed_bar_time, recipe_hash):
+        with self.lock:
+            entry = self.entries.get((symbol, timeframe))
+            if entry and entry[0] == closed_bar_time and entry[1] == recipe_hash:
+                self.stats["hits"] += 1
+                return entry[2]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, symbol, timeframe, closed_bar_time, recipe_hash, frame):
+        # Older bars never come back, so one entry per symbol is all we keep
+        with self.lock:
+            self.entries[(symbol, timeframe)] = (closed_bar_time, recipe_hash, frame)
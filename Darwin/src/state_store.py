@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+
+class StrategyStateStore:
+    """
+    The Filing Cabinet 🗄️. STRATEGY_STATE lives in a plain JSON file the Coach rewrites.
+    get() is a single os.stat() while nothing changed; the file is only re-read when its
+    stamp moves, and only re-parsed (version += 1) when the content hash actually differs.
+    Nothing here executes code, so a bad write can't crash the import machinery.
+
+    Every write() files the outgoing state under <name>.history/rNNNNNN.json first
+    (the last `keep` of them), so rollback() is one rename away from the previous playbook.
+    """
+    def __init__(self, path, keep=10):
+        self.path = path
+        self.history_dir = os.path.splitext(path)[0] + ".history"
+        self.keep = keep      # Snapshots kept for rollback (0 = no history)
+        self.version = 0      # Bumps on every content change: dependent caches compare against it
+        self.state = None
+        self._stamp = None    # (mtime_ns, size, inode) of the last file we looked at
+        self._digest = None   # sha1 of the last content we parsed
+
+    def get(self):
+        """Returns the current state dict (the same object until the file changes)."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            if self.state is None: raise
+            return self.state # File briefly missing: keep trading on the last good state
+
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp == self._stamp: return self.state
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if digest != self._digest:
+            try:
+                state = json.loads(raw.decode("utf-8"))
+            except ValueError as e:
+                if self.state is None: raise
+                print(f"   ⚠️ Strategy state unreadable, keeping v{self.version}: {e}")
+                return self.state # Stamp not saved -> retried next call
+            self.state, self._digest = state, digest
+            self.version += 1
+        self._stamp = stamp
+        return self.state
+
+    def write(self, new_state):
+        """Atomically replaces the file (readers see the old or the new state, never half)."""
+        raw = (json.dumps(new_state, indent=4) + "\n").encode("utf-8")
+        self._archive_current()
+        self._replace(self.path, raw)
+        return self.get()
+
+    def history(self):
+        """Snapshot revisions available for rollback, newest first."""
+        try:
+            names = os.listdir(self.history_dir)
+        except OSError:
+            return []
+        revs = [int(n[1:-5]) for n in names if n.startswith("r") and n.endswith(".json") and n[1:-5].isdigit()]
+        return sorted(revs, reverse=True)
+
+    def rollback(self, steps=1):
+        """
+        Puts the snapshot `steps` writes back in place and drops it (plus anything newer)
+        from the history, so calling it again keeps walking backwards.
+        Returns the restored state, or None if there is nothing that far back.
+        """
+        revs = self.history()
+        if steps < 1 or len(revs) < steps: return None
+        target = revs[steps - 1]
+        with open(self._snapshot_path(target), "rb") as f:
+            raw = f.read()
+        json.loads(raw.decode("utf-8")) # Refuse to restore a corrupt snapshot
+        self._replace(self.path, raw)
+        for rev in revs[:steps]:
+            try: os.remove(self._snapshot_path(rev))
+            except OSError: pass
+        return self.get()
+
+    def _snapshot_path(self, rev):
+        return os.path.join(self.history_dir, f"r{rev:06d}.json")
+
+    def _archive_current(self):
+        """Files the state that is about to be replaced, then trims the history to `keep`."""
+        if self.keep <= 0: return
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return # Nothing published yet
+        os.makedirs(self.history_dir, exist_ok=True)
+        revs = self.history()
+        self._replace(self._snapshot_path(revs[0] + 1 if revs else 1), raw)
+        for rev in revs[self.keep - 1:]:
+            try: os.remove(self._snapshot_path(rev))
+            except OSError: pass
+
+    @staticmethod
+    def _replace(path, raw):
+        # Write-temp-then-rename: flushed to disk before it becomes visible under `path`
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -1,10 +1,14 @@
 import time
 import os
 import subprocess
+import threading
+from collections import Counter
+from contextlib import nullcontext
 import MetaTrader5 as mt5
 import pandas as pd
 from datetime import datetime, timedelta
-from config import MT5_PATH, MT5_LOGIN, MT5_PASSWORD, MT5_SERVER, FIXED_LOT_SIZE
+from config import MT5_PATH, MT5_LOGIN, MT5_PASSWORD, MT5_SERVER, FIXED_LOT_SIZE, MT5_SERIALIZE
+from config import SYMBOL_META_TTL, TICK_CACHE_TTL
 
 class BrokerAPI:
     """
@@ -14,6 +18,15 @@ class BrokerAPI:
     def __init__(self):
         self.connected = False
         self.closed_markets = {} 
+        # 🔒 Scan threads share one terminal. Only the calls made from the scan pool take it;
+        # everything else runs on the main thread while the pool is idle.
+        self.mt5_lock = threading.Lock() if MT5_SERIALIZE else nullcontext()
+        # 🗂️ Symbol specs barely ever change, quotes change all the time: two caches, two TTLs
+        self.symbol_cache = {} # symbol -> (fetched_at, symbol_info)
+        self.tick_cache = {}   # symbol -> (fetched_at, tick)
+        self.cache_lock = threading.Lock()
+        self.calls = Counter() # Terminal reads that got past the caches
+        self.cache_hits = 0
 
     def startup(self):
         print(f"   🕵️  Scanning for MT5...")
@@ -62,16 +75,53 @@ class BrokerAPI:
 
     def get_data(self, symbol, timeframe, n=200):
         if not self.connected: return None
-        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, n)
+        with self.mt5_lock:
+            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, n)
         if rates is None: return None
         df = pd.DataFrame(rates)
         df['time'] = pd.to_datetime(df['time'], unit='s')
         return df
 
+    def get_last_bar_time(self, symbol, timeframe):
+        """Cheap probe: open time (epoch seconds) of the newest bar, via a 1-row copy."""
+        if not self.connected: return None
+        with self.mt5_lock:
+            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, 1)
+        if rates is None or len(rates) == 0: return None
+        return int(rates[0]['time'])
+
+    def _cached(self, cache, ttl, name, fetch, symbol):
+        now = time.monotonic()
+        with self.cache_lock:
+            hit = cache.get(symbol)
+            if hit and now - hit[0] < ttl:
+                self.cache_hits += 1
+                return hit[1]
+        value = fetch(symbol)
+        self.calls[name] += 1
+        if value is not None: # Misses aren't cached: the symbol may just need selecting
+            with self.cache_lock:
+                cache[symbol] = (now, value)
+        return value
+
+    def symbol_meta(self, symbol):
+        """
+        symbol_info, reused for SYMBOL_META_TTL seconds.
+        Read only the static specs from it (point, digits, trade_contract_size, filling_mode);
+        its spread/bid/ask are as old as the cache entry. Prices come from get_tick().
+        """
+        return self._cached(self.symbol_cache, SYMBOL_META_TTL, "symbol_info", mt5.symbol_info, symbol)
+
+    def get_tick(self, symbol):
+        """Latest quote, reused for TICK_CACHE_TTL seconds (so one order = one quote)."""
+        return self._cached(self.tick_cache, TICK_CACHE_TTL, "symbol_info_tick", mt5.symbol_info_tick, symbol)
+
     def get_spread(self, symbol):
-        info = mt5.symbol_info(symbol)
-        if info:
-            return info.spread
+        """Current spread in points (from the quote; the cached specs only supply `point`)."""
+        info = self.symbol_meta(symbol)
+        tick = self.get_tick(symbol)
+        if info and tick and info.point:
+            return int(round((tick.ask - tick.bid) / info.point))
         return 0
 
     def get_open_positions(self):
@@ -91,7 +141,7 @@ class BrokerAPI:
         """
         if not self.connected: return proposed_sl, False
 
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self.symbol_meta(symbol)
         if not symbol_info: return proposed_sl, False
 
         # Calculate Contract Size (e.g., 100,000 for Forex, 100 for Gold)
@@ -126,7 +176,7 @@ class BrokerAPI:
         Dynamically finds the supported filling mode for the symbol.
         Uses raw bitmask integers to avoid AttributeError on some MT5 libs.
         """
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self.symbol_meta(symbol)
         if not symbol_info:
             return mt5.ORDER_FILLING_IOC 
 
@@ -147,7 +197,7 @@ class BrokerAPI:
         if not self.connected: return None
         
         # 🛠️ GET SYMBOL INFO & DIGITS FOR NORMALIZATION
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = self.symbol_meta(symbol)
         if symbol_info is None:
             print(f"   ❌ Symbol {symbol} not found")
             return None
@@ -158,7 +208,7 @@ class BrokerAPI:
         type_op = mt5.ORDER_TYPE_BUY if is_long else mt5.ORDER_TYPE_SELL
         
         # Get Price and NORMALIZE everything
-        tick = mt5.symbol_info_tick(symbol)
+        tick = self.get_tick(symbol)
         price = tick.ask if is_long else tick.bid
         
         price = round(price, digits)
@@ -199,10 +249,11 @@ class BrokerAPI:
             return None
         return result
 
-    def close_trade(self, ticket, symbol, volume, is_long):
-        # Close opposite to open
+    def close_trade(self, ticket, symbol, volume, is_long, tick=None):
+        # Close opposite to open (one quote is enough for either side)
         type_op = mt5.ORDER_TYPE_SELL if is_long else mt5.ORDER_TYPE_BUY
-        price = mt5.symbol_info_tick(symbol).bid if is_long else mt5.symbol_info_tick(symbol).ask
+        tick = tick or self.get_tick(symbol)
+        price = tick.bid if is_long else tick.ask
         
         # 🛠️ GET CORRECT FILLING MODE
         fill_mode = self.get_filling_mode(symbol)
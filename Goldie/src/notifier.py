@@ -0,0 +1,94 @@
+import time
+import threading
+
+class TokenBucket:
+    """
+    The Turnstile 🎟️. `burst` messages may go out back to back, then one every 60/rate_per_min
+    seconds. Keeps us under Telegram's per-chat limits instead of finding them via 429s.
+    """
+    def __init__(self, rate_per_min, burst, clock=time.monotonic):
+        self.rate = rate_per_min / 60.0 # Tokens per second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.stamp = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self):
+        """Spends a token if one is there. Returns 0, or the seconds until the next one."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Blocks (the courier thread, never the loop) until a message may go out."""
+        while True:
+            wait = self.take()
+            if not wait: return
+            time.sleep(wait)
+
+
+class Notifier:
+    """
+    The Press Office 🗞️. Decides what actually gets sent and when:
+    - coalescing: messages in a category listed in `windows` are held for that many seconds
+      from the first one, then go out as ONE digest (e.g. ten TP chases in a minute),
+    - dedup: in a category listed in `dedup`, an identical message is sent once per window;
+      repeats are counted and reported when the window closes (the crash loop alert).
+    Messages without a category pass straight through.
+    """
+    def __init__(self, windows, dedup, clock=time.monotonic):
+        self.windows = windows
+        self.dedup = dedup
+        self.clock = clock
+        self.pending = {} # category -> [deadline, [texts]]
+        self.seen = {}    # (category, text) -> [window_end, repeats suppressed]
+        self.lock = threading.Lock()
+
+    def add(self, text, category=None):
+        """Takes one message. Returns the texts to send right now (often none)."""
+        now = self.clock()
+        with self.lock:
+            if category in self.dedup:
+                key = (category, text)
+                entry = self.seen.get(key)
+                if entry and now < entry[0]:
+                    entry[1] += 1
+                    return []
+                self.seen[key] = [now + self.dedup[category], 0]
+
+            if category in self.windows:
+                slot = self.pending.setdefault(category, [now + self.windows[category], []])
+                slot[1].append(text)
+                return []
+        return [text]
+
+    def due(self, flush=False):
+        """Digests whose window has closed (all of them with flush=True), plus repeat counts."""
+        now = self.clock()
+        out = []
+        with self.lock:
+            for category, (deadline, texts) in list(self.pending.items()):
+                if flush or now >= deadline:
+                    del self.pending[category]
+                    out.append(self.digest(category, texts))
+            for key, (window_end, repeats) in list(self.seen.items()):
+                if flush or now >= window_end:
+                    del self.seen[key]
+                    if repeats:
+                        minutes = max(1, round(self.dedup[key[0]] / 60))
+                        out.append(f"🔁 Repeated {repeats}x in the last {minutes} min:\n{key[1]}")
+        return out
+
+    @staticmethod
+    def digest(category, texts):
+        if len(texts) == 1: return texts[0]
+        return f"🗞️ {len(texts)} {category} updates:\n\n" + "\n\n".join(texts)
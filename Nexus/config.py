@@ -25,6 +25,17 @@ except Exception:
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org") # Point at a fake server to test
+TELEGRAM_POLL_TIMEOUT = 25 # Long-poll seconds per getUpdates (runs on its own thread)
+TELEGRAM_HUB = os.getenv("TELEGRAM_HUB", "") # e.g. "127.0.0.1:8765": share one telegram_hub.py with the other bots
+
+# --- NOTIFICATIONS ---
+# Seconds a category collects messages before they go out as one digest
+NOTIFY_COALESCE = {"trail": 60, "weekend": 30, "bench": 60}
+# Identical messages in these categories are sent once per window (repeats are counted)
+NOTIFY_DEDUP = {"crash": 600}
+NOTIFY_RATE_PER_MIN = 20 # Token bucket: sustained messages per minute (Telegram: ~20/min per chat)
+NOTIFY_BURST = 5         # ...and how many may go out back to back
 
 # --- MT5 SPECIFIC LOGINS ---
 MT5_LOGIN = int(os.getenv("MT5_LOGIN", 0)) 
@@ -55,6 +66,7 @@ WORKSHEET_LOGS = "Sheet3"
 WORKSHEET_COACH = "Coach Nexus"
 DRIVE_FOLDER_ID = "16ZJgg2S6NriT84AStjhvM9UI3ckp4rEM"
 MEMORY_FILENAME = "nexus_memory.json"
+MEMORY_COMPACT_EVERY = 200 # Journal lines before the memory snapshot is rewritten
 
 # --- GEMINI AI CONFIG (MULTI-KEY PROTOCOL) ---
 GEMINI_API_KEYS = []
@@ -127,4 +139,16 @@ TRAILING_CONFIG = {
     "tp_extension": 200,
     "sl_activation_distance": 100, 
     "sl_distance": 50
-}
\ No newline at end of file
+}
+
+# --- PARALLEL SCAN ⚡ ---
+SCAN_WORKERS = 4      # Pairs fetched + indicated at once (1 = old serial scan)
+MT5_SERIALIZE = True  # The MetaTrader5 package is not thread-safe: one terminal call at a time
+SYMBOL_META_TTL = 3600  # Seconds symbol specs (point, digits, contract size, filling mode) are reused
+TICK_CACHE_TTL = 1.0    # Seconds a quote is reused (prices move: keep this short)
+
+# --- STRATEGY STATE 🗄️ ---
+STATE_HISTORY_KEEP = 10  # Previous strategy_state.json versions kept for /rollback
+
+# --- SHEETS LOG WRITER ✍️ ---
+LOG_FLUSH_SECONDS = 5  # Closed-trade rows are batched into one append_rows per interval
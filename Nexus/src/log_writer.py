@@ -0,0 +1,119 @@
+import os
+import json
+import threading
+
+class SheetLogWriter:
+    """
+    The Scribe ✍️. Trade-log rows go to a local spool file first (one line each, durable),
+    and a background thread ships everything spooled so far with ONE append_rows call per
+    flush interval. If Google is unreachable the rows simply stay in the spool and go out
+    with the next successful flush, even after a restart.
+    The worksheet handle is opened once and only re-opened after a failed write.
+    """
+    def __init__(self, open_worksheet, spool_path, interval=5):
+        self.open_worksheet = open_worksheet # () -> gspread Worksheet
+        self.spool_path = spool_path
+        self.interval = interval
+        self.ws = None                       # Cached worksheet handle
+        self.healthy = True                  # Only log state changes, not every failed retry
+        self.stats = {"rows": 0, "flushes": 0, "failures": 0}
+        self.spool_lock = threading.Lock()   # Guards the spool file (appends vs. trimming)
+        self.send_lock = threading.Lock()    # One flush in flight at a time
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+    def start(self):
+        """Starts the background flusher (no-op if already running)."""
+        if self.thread is not None: return
+        with self.spool_lock:
+            # A crash mid-append leaves a torn last line: close it off so the next row starts clean
+            try:
+                with open(self.spool_path, "rb+") as f:
+                    f.seek(0, os.SEEK_END)
+                    if f.tell():
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n": f.write(b"\n")
+            except FileNotFoundError:
+                pass
+        self.thread = threading.Thread(target=self._run, name="sheet-log-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, row):
+        """Queues one row. Only touches the local disk; never blocks on the network."""
+        with self.spool_lock:
+            with open(self.spool_path, "a") as f:
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+        self.start()
+
+    def flush(self):
+        """Ships every spooled row now. Returns True when the spool is empty afterwards."""
+        with self.send_lock:
+            with self.spool_lock:
+                try:
+                    with open(self.spool_path, "rb") as f:
+                        raw = f.read()
+                except FileNotFoundError:
+                    return True
+            if not raw: return True
+
+            # Only whole lines go out; a torn tail (crash mid-append) stays for the next round
+            cut = raw.rfind(b"\n") + 1
+            rows = []
+            for line in raw[:cut].splitlines():
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    pass
+            if not rows:
+                self._trim(cut)
+                return True
+
+            try:
+                if self.ws is None: self.ws = self.open_worksheet()
+                self.ws.append_rows(rows)
+            except Exception as e:
+                self.ws = None # Stale handle / auth hiccup: re-open on the next attempt
+                self.stats["failures"] += 1
+                if self.healthy:
+                    print(f"   ⚠️ Sheets unreachable, {len(rows)} log rows kept in {self.spool_path}: {e}")
+                self.healthy = False
+                return False
+
+            self._trim(cut)
+            self.stats["rows"] += len(rows)
+            self.stats["flushes"] += 1
+            if not self.healthy: print("   ✅ Sheets reachable again. Spooled log rows delivered.")
+            self.healthy = True
+            print(f"   📝 Logged {len(rows)} row(s) to Sheets.")
+            return True
+
+    def stop(self):
+        """Final flush on shutdown. Whatever can't be sent stays spooled for next start."""
+        self.stopping = True
+        self.wake.set()
+        if self.thread is not None: self.thread.join(timeout=self.interval + 30)
+        self.flush()
+
+    def _trim(self, cut):
+        """Drops the first `cut` bytes (the rows just sent), keeping anything appended since."""
+        with self.spool_lock:
+            with open(self.spool_path, "rb") as f:
+                rest = f.read()[cut:]
+            if not rest:
+                os.remove(self.spool_path)
+                return
+            tmp_path = self.spool_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(rest)
+            os.replace(tmp_path, self.spool_path)
+
+    def _run(self):
+        while not self.stopping:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            if self.stopping: break
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"   ❌ Log Writer Error: {e}")
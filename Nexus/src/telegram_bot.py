@@ -1,78 +1,197 @@
+import queue
+import threading
 import requests
-import time
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, BOT_IDENTITY
+from multiprocessing.connection import Client
+from src.notifier import Notifier, TokenBucket
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, BOT_IDENTITY, TELEGRAM_API_URL, TELEGRAM_POLL_TIMEOUT, TELEGRAM_HUB
+from config import NOTIFY_COALESCE, NOTIFY_DEDUP, NOTIFY_RATE_PER_MIN, NOTIFY_BURST
 
 class TelegramBot:
     """
-    The Messenger 🕊️ (v2.1 - Timeout Proof)
+    The Messenger 🕊️ (v3.0 - Off the Loop)
     Handles Telegram commands specifically targeted at this bot.
+    All network I/O lives on two background threads, each with its own pooled requests.Session:
+    - the listener long-polls getUpdates and drops our commands into a queue,
+    - the courier drains the outbox and posts sendMessage.
+    send_msg() and get_latest_command() only touch the queues, so a slow Telegram API
+    never holds up the trading loop. Threads start on first use: a bot that only
+    sends (the Coach's) never polls, so it can't steal updates from main.py.
+    With TELEGRAM_HUB set, both threads talk to the shared telegram_hub.py process instead:
+    it polls once for every bot on the host and sends everyone's messages from one queue.
+    Outbound traffic goes through the Press Office (digests + crash dedup) and a token bucket.
     """
-    def __init__(self):
-        self.base_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
+    def __init__(self, base_url=None, poll_timeout=TELEGRAM_POLL_TIMEOUT, hub=TELEGRAM_HUB):
+        self.base_url = f"{base_url or TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}"
         self.chat_id = TELEGRAM_CHAT_ID
         self.last_update_id = 0
         self.identity = BOT_IDENTITY.lower()
-        
-    def send_msg(self, text):
-        """Sends a message with identity prefix."""
-        try:
-            formatted_text = f"[{self.identity.upper()}]\n{text}"
-            url = f"{self.base_url}/sendMessage"
-            payload = {"chat_id": self.chat_id, "text": formatted_text}
-            requests.post(url, json=payload, timeout=10) # 🛠️ Increased timeout
-        except Exception as e:
-            # We fail silently here to avoid spamming the console
-            pass 
+        self.poll_timeout = poll_timeout
+        self.hub_address = None
+        if hub:
+            host, _, port = str(hub).rpartition(":")
+            self.hub_address = (host or "127.0.0.1", int(port))
+        self.hub = None # Open hub connection (shared by listener and courier)
+        self.hub_lock = threading.Lock()
+
+        self.commands = queue.Queue() # Parsed commands, oldest first
+        self.outbox = queue.Queue()   # Texts cleared for sending, waiting for the courier
+        self.press = Notifier(NOTIFY_COALESCE, NOTIFY_DEDUP)
+        self.bucket = TokenBucket(NOTIFY_RATE_PER_MIN, NOTIFY_BURST)
+        self.stopping = threading.Event()
+        self.start_lock = threading.Lock()
+        self.listener = None
+        self.courier = None
+        self.healthy = True # Only log state changes, not every failed send
+
+    # --- Loop-facing API (never blocks) ---
+
+    def send_msg(self, text, category=None):
+        """
+        Queues a message (identity prefix added on the way out).
+        `category` opts into coalescing/dedup (see NOTIFY_COALESCE / NOTIFY_DEDUP).
+        """
+        for ready in self.press.add(text, category):
+            self.outbox.put(ready)
+        self._start("courier")
 
     def get_latest_command(self):
         """
-        Polls for commands.
+        Next command received since the last call, or None.
         """
+        self._start("listener")
         try:
-            url = f"{self.base_url}/getUpdates"
-            params = {"offset": self.last_update_id + 1, "timeout": 1}
-            
-            # 🛠️ Increased timeout to 10s to handle slow Telegram API
-            response = requests.get(url, params=params, timeout=10) 
-            
-            data = response.json()
-            
-            if not data.get("ok") or not data.get("result"):
-                return None
-
-            updates = data["result"]
-            cmd_action = None
-            
-            for update in updates:
-                self.last_update_id = update["update_id"]
-                
-                if "message" in update and "text" in update["message"]:
-                    msg = update["message"]["text"].strip().lower()
-                    sender_id = str(update["message"]["from"]["id"])
-                    
-                    if sender_id != self.chat_id:
-                        continue
-                        
-                    parts = msg.split()
-                    if not parts: continue
-                    
-                    base_cmd = parts[0]
-                    
-                    # 1. GLOBAL CALL
-                    if base_cmd == "/assemble":
-                        cmd_action = "status"
-                    
-                    # 2. TARGETED CALL (e.g. /darwin_pause)
-                    # We look for the pattern /{identity}_{command}
-                    # Example: /darwin_pause -> we want 'pause'
-                    elif base_cmd.startswith(f"/{self.identity}_"):
-                         # Remove the prefix "/darwin_" to get the command
-                         prefix_len = len(f"/{self.identity}_")
-                         cmd_action = base_cmd[prefix_len:]
-            
-            return cmd_action
+            return self.commands.get_nowait()
+        except queue.Empty:
+            return None
 
+    def stop(self, timeout=10):
+        """Gives queued messages (and held digests) up to `timeout` seconds to go out, then stops both threads."""
+        self.stopping.set()
+        if self.courier is not None: self.courier.join(timeout=timeout)
+        # The listener may be inside a long poll; it's a daemon, so no need to wait it out
+        if self.hub is not None: self._drop_hub(self.hub)
+
+    # --- Background threads ---
+
+    def _start(self, role):
+        with self.start_lock:
+            if getattr(self, role) is not None or self.stopping.is_set(): return
+            if role == "listener":
+                target = self._listen_hub if self.hub_address else self._listen
+            else:
+                target = self._deliver
+            thread = threading.Thread(target=target, name=f"telegram-{role}", daemon=True)
+            setattr(self, role, thread)
+            thread.start()
+
+    def _listen(self):
+        session = requests.Session()
+        while not self.stopping.is_set():
+            try:
+                params = {"offset": self.last_update_id + 1, "timeout": self.poll_timeout}
+                # Telegram holds the request open for up to poll_timeout seconds; give it headroom
+                response = session.get(f"{self.base_url}/getUpdates", params=params, timeout=self.poll_timeout + 10)
+                data = response.json()
+                if not data.get("ok"):
+                    self.stopping.wait(5)
+                    continue
+                for update in data.get("result", []):
+                    self.last_update_id = update["update_id"]
+                    cmd_action = self.parse_update(update)
+                    if cmd_action: self.commands.put(cmd_action)
+            except Exception as e:
+                # Silence the timeout error to keep logs clean; back off a bit before the next poll
+                self.stopping.wait(5)
+
+    def _hub_conn(self):
+        """The hub connection, (re)opened and introduced on demand."""
+        with self.hub_lock:
+            if self.hub is None:
+                conn = Client(self.hub_address, authkey=str(TELEGRAM_BOT_TOKEN).encode())
+                conn.send({"op": "hello", "identity": self.identity})
+                self.hub = conn
+                print(f"   ☎️ Connected to Telegram Hub at {self.hub_address[0]}:{self.hub_address[1]}")
+            return self.hub
+
+    def _drop_hub(self, conn):
+        with self.hub_lock:
+            if self.hub is conn: self.hub = None
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _listen_hub(self):
+        while not self.stopping.is_set():
+            conn = None
+            try:
+                conn = self._hub_conn()
+                msg = conn.recv()
+                if msg.get("op") == "command": self.commands.put(msg["cmd"])
+            except Exception as e:
+                # Hub down or restarting: reconnect in a bit (commands sent meanwhile are lost)
+                if conn is not None: self._drop_hub(conn)
+                self.stopping.wait(5)
+
+    def _deliver(self):
+        session = requests.Session()
+        while True:
+            try:
+                texts = [self.outbox.get(timeout=1)]
+            except queue.Empty:
+                texts = []
+            stopping = self.stopping.is_set()
+            texts += self.press.due(flush=stopping) # Digests whose window closed
+            if not texts:
+                if stopping: return
+                continue
+            for text in texts:
+                self._post(session, text)
+
+    def _post(self, session, text):
+        self.bucket.acquire()
+        text = f"[{self.identity.upper()}]\n{text}"
+        conn = None
+        try:
+            if self.hub_address:
+                conn = self._hub_conn()
+                conn.send({"op": "send", "text": text}) # The hub paces and posts it
+            else:
+                payload = {"chat_id": self.chat_id, "text": text}
+                session.post(f"{self.base_url}/sendMessage", json=payload, timeout=10).raise_for_status()
+            if not self.healthy: print("   ✅ Telegram reachable again.")
+            self.healthy = True
         except Exception as e:
-            # Silence the timeout error to keep logs clean
-            # print(f"⚠️ Telegram Poll Error: {e}") 
-            return None
\ No newline at end of file
+            if conn is not None: self._drop_hub(conn)
+            # Dropped, same as before: an alert is only worth something while it's fresh
+            if self.healthy: print(f"   ⚠️ Telegram send failed (dropping message): {e}")
+            self.healthy = False
+
+    def parse_update(self, update):
+        """The command in one update meant for this bot, or None."""
+        if "message" not in update or "text" not in update["message"]:
+            return None
+
+        msg = update["message"]["text"].strip().lower()
+        sender_id = str(update["message"]["from"]["id"])
+
+        if sender_id != self.chat_id:
+            return None
+
+        parts = msg.split()
+        if not parts: return None
+
+        base_cmd = parts[0]
+
+        # 1. GLOBAL CALL
+        if base_cmd == "/assemble":
+            return "status"
+
+        # 2. TARGETED CALL (e.g. /darwin_pause)
+        # We look for the pattern /{identity}_{command}
+        # Example: /darwin_pause -> we want 'pause'
+        if base_cmd.startswith(f"/{self.identity}_"):
+            # Remove the prefix "/darwin_" to get the command
+            return base_cmd[len(f"/{self.identity}_"):]
+
+        return None
@@ -1,5 +1,6 @@
 import json
 import io
+import os
 import time
 import requests
 import gspread 
@@ -8,23 +9,37 @@ from datetime import datetime
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
+from src.trade_registry import OpenTradeRegistry
+from src.log_writer import SheetLogWriter
 
 # Import the pre-parsed DICT from config
 from config import (
     GOOGLE_CREDS_DICT, SHEET_URL, WORKSHEET_LOGS, USER_DEFAULT_MARKETS, 
-    DEFAULT_PARAMS, DRIVE_FOLDER_ID, DEFAULT_STRATEGY, MEMORY_FILENAME
+    DEFAULT_PARAMS, DRIVE_FOLDER_ID, DEFAULT_STRATEGY, MEMORY_FILENAME, MEMORY_COMPACT_EVERY,
+    LOG_FLUSH_SECONDS
 )
 
 class CloudManager:
     """
     The Cloud Manager ☁️
     Handles Google Sheets (Logs) and Google Drive (Memory JSON).
+    Memory = a JSON snapshot + an append-only journal of trade mutations next to it.
     """
     def __init__(self):
         self.sheets_client = None
         self.drive_service = None
         self.state = {}
+        self.open_trades = OpenTradeRegistry() # 📋 'open_bot_trades', indexed (lives outside self.state)
         self.file_id = None
+        # 📜 Write-ahead journal: one line per trade mutation, folded into the snapshot every so often
+        self.journal_path = os.path.splitext(MEMORY_FILENAME)[0] + ".journal"
+        self.journal_len = 0
+        # ✍️ Sheets log rows: spooled locally, shipped in batches by a background thread
+        self.log_writer = SheetLogWriter(
+            self._open_log_worksheet,
+            os.path.splitext(MEMORY_FILENAME)[0] + "_log_spool.jsonl",
+            interval=LOG_FLUSH_SECONDS
+        )
         
         # Default Memory Structure
         self.default_state = {
@@ -60,39 +75,131 @@ class CloudManager:
             print(f"   ❌ Cloud Config Error: {e}")
 
     def load_memory(self):
-        """Loads memory from local JSON file."""
+        """Loads the memory snapshot, then replays the journal on top of it."""
         try:
             with open(MEMORY_FILENAME, "r") as f:
-                self.state = json.load(f)
+                self._adopt(json.load(f))
             print(f"   🧠 Syncing with Hive Mind ({MEMORY_FILENAME})...")
+            replayed, torn = self._replay_journal()
+            if replayed: print(f"   📜 Replayed {replayed} journal entries.")
             print("   ✅ Memory Downloaded.")
+            if torn: self.save_memory() # Half-written last record (crash): fold + start a clean journal
         except FileNotFoundError:
             print("   🧠 No memory file found. Starting fresh.")
-            self.state = self.default_state
+            self._adopt(self.default_state)
+            self._replay_journal() # Trades journaled before the first snapshot ever landed
             self.save_memory()
         except Exception as e:
             print(f"   ⚠️ Memory Read Error: {e}")
-            self.state = self.default_state
+            self._adopt(self.default_state)
 
     def save_memory(self):
-        """Saves current state to local JSON file."""
+        """
+        Compaction 🗜️: writes the whole state as the snapshot (temp file + rename)
+        and empties the journal. Trade mutations don't call this; they append to the journal.
+        """
         try:
-            with open(MEMORY_FILENAME, "w") as f:
-                json.dump(self.state, f, indent=4)
+            tmp_path = MEMORY_FILENAME + ".tmp"
+            snapshot = dict(self.state, open_bot_trades=self.open_trades.to_list(), journal_seq=self.journal_seq)
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f, indent=4)
+            os.replace(tmp_path, MEMORY_FILENAME)
+            # Snapshot now holds every journaled change. If we die right here, replay skips
+            # the records at or below its journal_seq, so nothing is applied twice.
+            open(self.journal_path, "w").close()
+            self.journal_len = 0
         except Exception as e:
             print(f"   ❌ Failed to save memory: {e}")
 
+    def _adopt(self, state):
+        """Takes a memory dict as loaded from disk; its open_bot_trades list becomes the registry."""
+        self.state = dict(state)
+        self.open_trades = OpenTradeRegistry(self.state.pop('open_bot_trades', []))
+        self.journal_seq = int(self.state.pop('journal_seq', 0)) # Last journal record folded into this state
+
+    def _journal(self, op, **fields):
+        """Applies one mutation and appends it to the journal as a single compact line."""
+        self.journal_seq += 1
+        record = dict(seq=self.journal_seq, op=op, **fields)
+        self._apply(record)
+        try:
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self.journal_len += 1
+        except Exception as e:
+            print(f"   ❌ Failed to journal {op}: {e}")
+            self.save_memory() # Fall back to a full write so the change isn't lost
+            return
+        if self.journal_len >= MEMORY_COMPACT_EVERY:
+            self.save_memory()
+
+    def _replay_journal(self):
+        """
+        Re-applies journaled mutations newer than the snapshot (records at or below its
+        journal_seq are already in it). Returns (records applied, torn tail found).
+        """
+        self.journal_len = 0
+        snapshot_seq = self.journal_seq
+        try:
+            with open(self.journal_path, "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0, False
+
+        torn = False
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                torn = True # Only the last line can be cut short by a crash
+                continue
+            seq = record.get("seq")
+            if seq is not None:
+                if seq <= snapshot_seq: continue
+                self.journal_seq = max(self.journal_seq, seq)
+            self._apply(record) # Records without seq predate numbering: applied as before
+            self.journal_len += 1
+        return self.journal_len, torn
+
+    def _apply(self, record):
+        """
+        The one place trade mutations happen (live and on replay).
+        Not idempotent ("close" appends to trade_history), so each record must be applied
+        exactly once: _replay_journal skips the ones the snapshot already holds by seq.
+        """
+        op = record["op"]
+
+        if op == "register":
+            self.open_trades.add(record["trade"])
+
+        elif op == "deregister":
+            self.open_trades.remove(record["ticket"])
+
+        elif op == "update":
+            self.open_trades.update(record["ticket"], record["data"])
+
+        elif op == "close":
+            # 1. Find and Remove from Open
+            trade_to_close = self.open_trades.remove(record["ticket"])
+            if trade_to_close is None: return
+
+            # 2. Add to History with Exit Data (Keep history small: last 100)
+            trade_to_close.update(record["exit"])
+            self.state['trade_history'].append(trade_to_close.to_dict())
+            if len(self.state['trade_history']) > 100:
+                self.state['trade_history'].pop(0)
+
+    def _open_log_worksheet(self):
+        return self.sheets_client.open_by_url(self.sheet_url).worksheet(WORKSHEET_LOGS)
+
     def log_trade(self, trade_data, reason="CLOSED"):
-        """Logs a trade event to Google Sheets."""
+        """Queues a trade event for Google Sheets (sent by the log writer, see flush_logs)."""
         # 🚫 LOG CLEANUP: Don't log "OPEN" events to sheet, only closed trades.
         if reason == "OPEN":
             # print(f"   📝 Trade opened (Memory Only): {trade_data.get('pair')}")
             return
 
         try:
-            sheet = self.sheets_client.open_by_url(self.sheet_url)
-            ws = sheet.worksheet(WORKSHEET_LOGS)
-            
             # Ensure no None values
             row = [
                 str(trade_data.get('ticket', '')),
@@ -112,66 +219,35 @@ class CloudManager:
                 str(reason)
             ]
             
-            ws.append_row(row)
-            print(f"   📝 Logged {reason} for {trade_data.get('pair')}")
+            self.log_writer.submit(row)
+            print(f"   📝 Queued {reason} for {trade_data.get('pair')}")
 
         except Exception as e:
             print(f"   ❌ Logging Failed: {e}")
 
     def register_trade(self, trade):
         """Adds trade to local memory and syncs."""
-        self.state['open_bot_trades'].append(trade)
-        self.save_memory()
+        self._journal("register", trade=trade.to_dict() if hasattr(trade, 'to_dict') else trade)
 
     def deregister_trade(self, ticket):
         """Removes a trade from memory (used when closed)."""
-        # Filter out the trade with the matching ticket
-        original_count = len(self.state['open_bot_trades'])
-        self.state['open_bot_trades'] = [t for t in self.state['open_bot_trades'] if t['ticket'] != ticket]
-        
-        if len(self.state['open_bot_trades']) < original_count:
-            self.save_memory()
+        if ticket in self.open_trades:
+            self._journal("deregister", ticket=ticket)
             # print(f"   🗑️ Trade {ticket} removed from memory.")
 
     def update_trade(self, ticket, data):
         """Updates a trade in memory (e.g., changing SL/TP)."""
-        found = False
-        for i, t in enumerate(self.state['open_bot_trades']):
-            if t['ticket'] == ticket:
-                self.state['open_bot_trades'][i].update(data)
-                found = True
-                break
-        
-        if found:
-            self.save_memory()
+        if ticket in self.open_trades:
+            self._journal("update", ticket=ticket, data=data)
 
     def close_trade_in_memory(self, ticket, exit_data):
         """
         Moves a trade from 'open_bot_trades' to 'trade_history'.
         (Helper method if you want to keep local history).
         """
-        trade_to_close = None
-        # 1. Find and Remove from Open
-        new_open_list = []
-        for t in self.state['open_bot_trades']:
-            if t['ticket'] == ticket:
-                trade_to_close = t
-            else:
-                new_open_list.append(t)
-        
-        self.state['open_bot_trades'] = new_open_list
-
-        # 2. Add to History with Exit Data
-        if trade_to_close:
-            trade_to_close.update(exit_data)
-            self.state['trade_history'].append(trade_to_close)
-            
-            # Keep history small? (Optional: Limit to last 100)
-            if len(self.state['trade_history']) > 100:
-                self.state['trade_history'].pop(0)
-
-            self.save_memory()
+        if ticket in self.open_trades:
+            self._journal("close", ticket=ticket, exit=exit_data)
 
     def get_open_trade_tickets(self):
         """Returns a list of currently open ticket numbers."""
-        return [t['ticket'] for t in self.state.get('open_bot_trades', [])]
\ No newline at end of file
+        return self.open_trades.tickets()
\ No newline at end of file
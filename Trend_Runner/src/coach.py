@@ -1,16 +1,14 @@
-import os
-import re
 import json
 import warnings
 import pandas as pd
-import importlib 
 import time
 import google.generativeai as genai
 from datetime import datetime, timedelta
 from src.cloud import CloudManager
 from src.telegram_bot import TelegramBot
-import src.strategy as strategy_module 
-from config import GEMINI_API_KEYS # 🛠️ Import List, not single key
+from src.strategy import STATE_FILE
+from src.state_store import StrategyStateStore
+from config import GEMINI_API_KEYS, STATE_HISTORY_KEEP # 🛠️ Import List, not single key
 
 # 🔇 SILENCE THE GOOGLE WARNING
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -27,17 +25,16 @@ class Coach:
     """
     The Supervisor. 🧢
     Analyses game tape (history), benches players (pairs), 
-    and adjusts the playbook (strategy.py) using AI.
+    and adjusts the playbook (strategy_state.json) using AI.
     """
-    def __init__(self):
+    def __init__(self, bot=None):
         print("🧢 Coach: Initializing...")
         self.cloud = CloudManager()
-        self.bot = TelegramBot()
+        self.bot = bot or TelegramBot() # Share main's messenger: one outbox, one session
         
-        # 🛠️ PATHING FIX: Locate strategy.py relative to coach.py (same folder)
-        # This prevents "File Not Found" errors if running from different dirs
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        self.strategy_file = os.path.join(current_dir, "strategy.py")
+        # 🗄️ The playbook: strategy_state.json next to strategy.py (path resolved there)
+        # Every rewrite keeps the previous playbook around so /rollback is instant
+        self.store = StrategyStateStore(STATE_FILE, keep=STATE_HISTORY_KEEP)
         
         # AI Setup (Multi-Key)
         self.api_keys = GEMINI_API_KEYS
@@ -166,13 +163,8 @@ class Coach:
             return 'gemini-1.5-flash'
 
     def get_current_strategy_state(self):
-        """Forces a reload of the strategy module to get fresh state from disk."""
-        try:
-            importlib.reload(strategy_module)
-            return strategy_module.STRATEGY_STATE
-        except Exception as e:
-            print(f"   ⚠️ Coach Error: Could not reload strategy state. {e}")
-            return strategy_module.STRATEGY_STATE
+        """Fresh state from disk (re-parsed only if the file changed since last time)."""
+        return self.store.get()
 
     def fetch_game_tape(self):
         """Reads trade history from Google Sheets via CloudManager."""
@@ -347,20 +339,20 @@ class Coach:
                 lift_time = now + timedelta(hours=self.bench_duration)
                 lift_str = lift_time.strftime("%Y-%m-%d %H:%M:%S")
                 print(f"   🚨 BENCHING {pair} (WinRate: {win_rate:.2f}).")
-                self.bot.send_msg(f"🧢 COACH INTERVENTION\n🚫 Benching {pair}\n📉 WR: {int(win_rate*100)}% ({wins}/{total})\n⏳ Until: {lift_str}")
+                self.bot.send_msg(f"🧢 COACH INTERVENTION\n🚫 Benching {pair}\n📉 WR: {int(win_rate*100)}% ({wins}/{total})\n⏳ Until: {lift_str}", category="bench")
                 new_bench_state[pair] = lift_str
                 dirty = True
 
         if dirty:
             full_state = state.copy()
             full_state["BENCHED_PAIRS"] = new_bench_state
-            self._update_strategy_file(full_state)
+            self._update_strategy_state(full_state)
 
     def check_activity(self):
         """Checks if bot is too silent."""
         self.cloud.load_memory() 
         state = self.cloud.state
-        if len(state.get('open_bot_trades', [])) > 0: return
+        if len(self.cloud.open_trades) > 0: return
 
         history = state.get('trade_history', [])
         if not history: return 
@@ -400,7 +392,7 @@ class Coach:
             
             if "ACTIVE_CONCOCTION" in new_state and "PARAMS" in new_state:
                 print("   🧢 Oracle has updated parameters for activity.")
-                self._update_strategy_file(new_state)
+                self._update_strategy_state(new_state)
                 self.bot.send_msg(f"✅ ADJUSTMENT APPLIED\nSettings loosened to find more trades.")
         except Exception as e:
             print(f"   ❌ Silence Fix Failed: {e}")
@@ -481,7 +473,7 @@ class Coach:
             
             if "ACTIVE_CONCOCTION" in new_state and "PARAMS" in new_state:
                 print("   🧢 Oracle has spoken. Applying updates...")
-                self._update_strategy_file(new_state)
+                self._update_strategy_state(new_state)
                 new_recipe = new_state['ACTIVE_CONCOCTION']
                 self.bot.send_msg(f"🧢 ORACLE UPDATE APPLIED\n🆕 New Recipe: {new_recipe}\n🧠 Strategy optimized.")
             else:
@@ -490,34 +482,31 @@ class Coach:
             print(f"   ❌ AI Optimization Failed: {e}")
             self.bot.send_msg(f"❌ AI Failed: {e}")
 
-    def _update_strategy_file(self, new_state_dict):
-        """Surgically updates strategy.py"""
+    def _update_strategy_state(self, new_state_dict):
+        """Atomically rewrites strategy_state.json. The bot picks it up on its next loop."""
         try:
-            with open(self.strategy_file, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            new_state_str = json.dumps(new_state_dict, indent=4)
-            new_state_str = new_state_str.replace("true", "True").replace("false", "False").replace("null", "None")
-            
-            start_marker = "# 🧠 AI EXCLUSIVE ZONE (Gemini edits this via Coach)"
-            end_marker = "# 🛑 END AI ZONE"
-            
-            p_start = re.escape(start_marker)
-            p_end = re.escape(end_marker)
-            pattern = f"({p_start})(.*?)({p_end})"
-            new_block = f"\n{start_marker}\n# The Coach (coach.py) uses Regex to surgically update this block.\n# ==============================================================================\nSTRATEGY_STATE = {new_state_str}\n# ==============================================================================\n{end_marker}"
-            
-            new_content = re.sub(pattern, new_block, content, flags=re.DOTALL)
-            
-            with open(self.strategy_file, "w", encoding="utf-8") as f:
-                f.write(new_content)
-                
-            print("   ✅ strategy.py successfully updated.")
+            self.store.write(new_state_dict)
+            print(f"   ✅ strategy_state.json successfully updated (v{self.store.version}).")
             
         except Exception as e:
-            print(f"   ❌ Failed to update strategy file: {e}")
+            print(f"   ❌ Failed to update strategy state: {e}")
             self.bot.send_msg(f"⚠️ COACH ERROR: Failed to write to file.\n{e}")
 
+    def rollback_strategy(self, steps=1):
+        """Restores the playbook from `steps` Coach writes ago. Returns a report for Telegram."""
+        try:
+            state = self.store.rollback(steps)
+            if state is None:
+                return "⚠️ ROLLBACK: No earlier strategy snapshot on file."
+            print(f"   ⏪ strategy_state.json rolled back {steps} step(s) (v{self.store.version}).")
+            return (f"⏪ STRATEGY ROLLED BACK\n"
+                    f"🧪 Recipe: {state.get('ACTIVE_CONCOCTION', [])}\n"
+                    f"📚 Snapshots left: {len(self.store.history())}")
+        except Exception as e:
+            print(f"   ❌ Rollback Failed: {e}")
+            return f"❌ ROLLBACK FAILED: {e}"
+
 if __name__ == "__main__":
     c = Coach()
-    c.consult_oracle()
\ No newline at end of file
+    c.consult_oracle()
+    c.bot.stop() # Deliver the report before the process exits
@@ -0,0 +1,386 @@
+import math
+from collections import deque
+from copy import deepcopy
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# ---- INCREMENTAL INDICATOR ENGINE ----
+# Streaming twins of the 'ta' indicators. Each one eats a single bar and returns
+# the value 'ta' would have produced for that bar over the same history, using the
+# exact same arithmetic (pandas ewm / rolling formulas, ta's Wilder seeds).
+# ==============================================================================
+
+def _div(a, b):
+    """Float division with NumPy semantics (x/0 -> ±inf or nan) instead of ZeroDivisionError."""
+    if b == 0:
+        if a == 0 or a != a: return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+class EWMean:
+    """Twin of pandas Series.ewm(com=..., adjust=False, min_periods=...).mean()."""
+    def __init__(self, com, min_periods):
+        alpha = 1.0 / (1.0 + com)
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = alpha
+        self.min_periods = max(int(min_periods), 1)
+        self.weighted = None
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    @classmethod
+    def span(cls, span):
+        return cls((span - 1) / 2, span)
+
+    @classmethod
+    def alpha(cls, alpha, min_periods):
+        return cls((1 - alpha) / alpha, min_periods)
+
+    def update(self, cur):
+        is_obs = cur == cur
+        self.nobs += int(is_obs)
+        if self.weighted is None:
+            self.weighted = cur
+        elif self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_obs:
+                if self.weighted != cur:
+                    self.weighted = self.old_wt * self.weighted + self.new_wt * cur
+                    self.weighted /= (self.old_wt + self.new_wt)
+                self.old_wt = 1.0
+        elif is_obs:
+            self.weighted = cur
+        return self.weighted if self.nobs >= self.min_periods else math.nan
+
+class RollingMean:
+    """Twin of pandas rolling(window, min_periods).mean() (Kahan-compensated add/remove)."""
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs, self.sum_x, self.neg_ct = 0, 0.0, 0
+        self.comp_add, self.comp_remove = 0.0, 0.0
+        self.same_count, self.prev_value = 0, math.nan
+
+    def update(self, val):
+        self.values.append(val)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.comp_remove
+                t = self.sum_x + y
+                self.comp_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, old) < 0: self.neg_ct -= 1
+        if val == val:
+            self.nobs += 1
+            y = val - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, val) < 0: self.neg_ct += 1
+            self.same_count = self.same_count + 1 if val == self.prev_value else 1
+            self.prev_value = val
+
+        if self.nobs >= self.min_periods and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.same_count >= self.nobs: return self.prev_value
+            if self.neg_ct == 0 and result < 0: return 0.0
+            if self.neg_ct == self.nobs and result > 0: return 0.0
+            return result
+        return math.nan
+
+class RollingExtreme:
+    """Rolling max/min over a monotonic deque: O(1) amortized per bar, exact values."""
+    def __init__(self, window, min_periods=None, mode="max"):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.is_max = (mode == "max")
+        self.queue = deque() # (bar_no, value), values monotonic from the front
+        self.count = 0
+
+    def update(self, val):
+        q = self.queue
+        if self.is_max:
+            while q and q[-1][1] <= val: q.pop()
+        else:
+            while q and q[-1][1] >= val: q.pop()
+        q.append((self.count, val))
+        self.count += 1
+        while q[0][0] <= self.count - 1 - self.window: q.popleft()
+        return q[0][1] if min(self.count, self.window) >= max(self.min_periods, 1) else math.nan
+
+# ------------------------------------------------------------------------------
+# 📈 INDICATORS (update(high, low, close) -> {column: value})
+# ------------------------------------------------------------------------------
+
+class EMA:
+    def __init__(self, window, name):
+        self.ema, self.name = EWMean.span(window), name
+
+    def update(self, high, low, close):
+        return {self.name: self.ema.update(close)}
+
+class SMA:
+    def __init__(self, window, name):
+        self.sma, self.name = RollingMean(window), name
+
+    def update(self, high, low, close):
+        return {self.name: self.sma.update(close)}
+
+class RSI:
+    """ta.momentum.RSIIndicator: Wilder smoothing via ewm(alpha=1/window)."""
+    def __init__(self, window, name):
+        self.up = EWMean.alpha(1 / window, window)
+        self.down = EWMean.alpha(1 / window, window)
+        self.prev_close, self.name = None, name
+
+    def update(self, high, low, close):
+        diff = close - self.prev_close if self.prev_close is not None else math.nan
+        self.prev_close = close
+        emaup = self.up.update(diff if diff > 0 else 0.0)
+        emadn = self.down.update(-(diff if diff < 0 else 0.0))
+        rsi = 100.0 if emadn == 0 else 100 - (100 / (1 + emaup / emadn))
+        return {self.name: rsi}
+
+class ATR:
+    """ta.volatility.AverageTrueRange: zeros until the window fills, seeded with the mean true range."""
+    def __init__(self, window, name=None):
+        self.window, self.name = window, name
+        self.prev_close = None
+        self.seed = []
+        self.atr = 0.0
+
+    def true_range(self, high, low, close):
+        pc, self.prev_close = self.prev_close, close
+        if pc is None: return high - low
+        return max(high - low, abs(high - pc), abs(low - pc))
+
+    def step(self, high, low, close):
+        tr = self.true_range(high, low, close)
+        if len(self.seed) < self.window:
+            self.seed.append(tr)
+            if len(self.seed) == self.window: self.atr = float(np.mean(np.array(self.seed)))
+            return self.atr
+        self.atr = (self.atr * (self.window - 1) + tr) / float(self.window)
+        return self.atr
+
+    def update(self, high, low, close):
+        return {self.name: self.step(high, low, close)}
+
+class MACD:
+    def __init__(self, fast, slow, sign, macd_name, signal_name=None):
+        self.fast, self.slow = EWMean.span(fast), EWMean.span(slow)
+        self.signal = EWMean.span(sign)
+        self.macd_name, self.signal_name = macd_name, signal_name
+
+    def update(self, high, low, close):
+        macd = self.fast.update(close) - self.slow.update(close)
+        sig = self.signal.update(macd)
+        out = {self.macd_name: macd}
+        if self.signal_name: out[self.signal_name] = sig
+        return out
+
+class TRIX:
+    def __init__(self, window, name):
+        self.emas = [EWMean.span(window) for _ in range(3)]
+        self.prev, self.name = math.nan, name
+
+    def update(self, high, low, close):
+        e3 = close
+        for ema in self.emas: e3 = ema.update(e3)
+        trix = _div(e3 - self.prev, self.prev) * 100
+        self.prev = e3
+        return {self.name: trix}
+
+class ROC:
+    def __init__(self, window, name):
+        self.closes = deque(maxlen=window + 1)
+        self.name = name
+
+    def update(self, high, low, close):
+        self.closes.append(close)
+        if len(self.closes) <= self.closes.maxlen - 1: return {self.name: math.nan}
+        old = self.closes[0]
+        return {self.name: _div(close - old, old) * 100}
+
+class Donchian:
+    def __init__(self, window, upper_name, lower_name):
+        self.hi = RollingExtreme(window, mode="max")
+        self.lo = RollingExtreme(window, mode="min")
+        self.upper_name, self.lower_name = upper_name, lower_name
+
+    def update(self, high, low, close):
+        return {self.upper_name: self.hi.update(high), self.lower_name: self.lo.update(low)}
+
+class WilliamsR:
+    def __init__(self, lbp, name):
+        self.hi = RollingExtreme(lbp, mode="max")
+        self.lo = RollingExtreme(lbp, mode="min")
+        self.name = name
+
+    def update(self, high, low, close):
+        hh, ll = self.hi.update(high), self.lo.update(low)
+        return {self.name: _div(-100 * (hh - close), hh - ll)}
+
+class Stochastic:
+    def __init__(self, window, smooth_window, k_name, d_name=None):
+        self.hi = RollingExtreme(window, mode="max")
+        self.lo = RollingExtreme(window, mode="min")
+        self.d = RollingMean(smooth_window)
+        self.k_name, self.d_name = k_name, d_name
+
+    def update(self, high, low, close):
+        smax, smin = self.hi.update(high), self.lo.update(low)
+        k = _div(100 * (close - smin), smax - smin)
+        d = self.d.update(k)
+        out = {self.k_name: k}
+        if self.d_name: out[self.d_name] = d
+        return out
+
+class Ichimoku:
+    """Senkou spans A/B as ta computes them with visual=False (no forward shift)."""
+    def __init__(self, a_name, b_name, window1=9, window2=26, window3=52):
+        self.conv = (RollingExtreme(window1, mode="max"), RollingExtreme(window1, mode="min"))
+        self.base = (RollingExtreme(window2, mode="max"), RollingExtreme(window2, mode="min"))
+        self.span_b = (RollingExtreme(window3, 0, "max"), RollingExtreme(window3, 0, "min"))
+        self.a_name, self.b_name = a_name, b_name
+
+    def update(self, high, low, close):
+        conv = 0.5 * (self.conv[0].update(high) + self.conv[1].update(low))
+        base = 0.5 * (self.base[0].update(high) + self.base[1].update(low))
+        span_b = 0.5 * (self.span_b[0].update(high) + self.span_b[1].update(low))
+        return {self.a_name: 0.5 * (conv + base), self.b_name: span_b}
+
+class Keltner:
+    """The bots' manual Keltner: EMA(close) ± ATR * mult."""
+    def __init__(self, ema_window, atr_window, mult, upper_name, lower_name):
+        self.ema, self.atr = EWMean.span(ema_window), ATR(atr_window)
+        self.mult = mult
+        self.upper_name, self.lower_name = upper_name, lower_name
+
+    def update(self, high, low, close):
+        ema, atr = self.ema.update(close), self.atr.step(high, low, close)
+        return {self.upper_name: ema + (atr * self.mult), self.lower_name: ema - (atr * self.mult)}
+
+class ADX:
+    """
+    ta.trend.ADXIndicator, bar by bar. Same Wilder sums seeded from the first window,
+    same zeros during warmup (ADX is 0 until bar 2*window-1).
+    """
+    def __init__(self, window, name):
+        self.window, self.name = window, name
+        self.prev = None # (high, low, close) of the previous bar
+        self.bars = 0
+        self.seed = ([], [], []) # dm, +dm, -dm of bars 1..window
+        self.trs = self.dip = self.din = 0.0
+        self.di_seed = []
+        self.adx = 0.0
+
+    def update(self, high, low, close):
+        prev, self.prev = self.prev, (high, low, close)
+        bar, w = self.bars, self.window
+        self.bars += 1
+        if prev is None: return {self.name: 0.0}
+
+        ph, pl, pc = prev
+        dm = max(high, pc) - min(low, pc)
+        diff_up, diff_down = high - ph, pl - low
+        pos = abs(diff_up) if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = abs(diff_down) if (diff_down > diff_up and diff_down > 0) else 0.0
+
+        if bar <= w:
+            for bucket, val in zip(self.seed, (dm, pos, neg)): bucket.append(val)
+            if bar < w: return {self.name: 0.0}
+            self.trs, self.dip, self.din = (float(np.array(b).sum()) for b in self.seed)
+        else:
+            self.trs = self.trs - (self.trs / float(w)) + dm
+            self.dip = self.dip - (self.dip / float(w)) + pos
+            self.din = self.din - (self.din / float(w)) + neg
+
+        dip = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        din = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+        dx = 100 * abs((dip - din) / (dip + din)) if dip + din != 0 else 0.0
+
+        if len(self.di_seed) < w:
+            self.di_seed.append(dx)
+            if len(self.di_seed) == w: self.adx = float(np.array(self.di_seed).mean())
+            return {self.name: self.adx}
+        self.adx = ((self.adx * (w - 1)) + dx) / float(w)
+        return {self.name: self.adx}
+
+# ------------------------------------------------------------------------------
+# ⚙️ THE ENGINE
+# ------------------------------------------------------------------------------
+
+class IndicatorEngine:
+    """
+    The Ticker Tape 📼. Holds one set of streaming indicators for one symbol.
+    Feed it bars oldest-first; each bar costs O(1) instead of a full 'ta' pass.
+    A bar fed with closed=False (the forming candle) can be fed again with the same
+    time: the engine rolls back to the state before it and re-applies the new values.
+    """
+    def __init__(self, build, history=500):
+        self.build = build       # () -> list of indicators, used for (re)warming
+        self.history = history   # How many past output rows frame() can hand back
+        self.reset()
+
+    def reset(self):
+        self.indicators = self.build()
+        self.rows = deque(maxlen=self.history) # (time, {column: value})
+        self.last_time = None
+        self._checkpoint = None # Indicator state from before the forming bar
+
+    def update(self, t, high, low, close, closed=True):
+        if t == self.last_time:
+            if self._checkpoint is None: return self.rows[-1][1] # Already final
+            self.indicators = deepcopy(self._checkpoint)
+            self.rows.pop()
+        self._checkpoint = None if closed else deepcopy(self.indicators)
+
+        values = {"close": close}
+        for ind in self.indicators: values.update(ind.update(high, low, close))
+        self.rows.append((t, values))
+        self.last_time = t
+        return values
+
+    def sync(self, df, forming_last=True):
+        """
+        Brings the engine up to date with an OHLC frame (oldest first).
+        Only bars at or after the last one seen are applied. If the frame doesn't
+        reach back to that bar (gap, new symbol), the engine re-warms from the frame.
+        Returns the number of bars applied.
+        """
+        times = df['time'].to_numpy()
+        n = len(times)
+        if n == 0: return 0
+
+        start = -1
+        if self.last_time is not None:
+            start = int(np.searchsorted(times, self.last_time, side="left"))
+            if start >= n or times[start] != self.last_time: start = -1
+        if start < 0:
+            self.reset()
+            start = 0
+
+        highs, lows, closes = (df[c].to_numpy(dtype=float) for c in ('high', 'low', 'close'))
+        for i in range(start, n):
+            self.update(times[i], float(highs[i]), float(lows[i]), float(closes[i]),
+                        closed=(i < n - 1 or not forming_last))
+        return n - start
+
+    def frame(self, df):
+        """Returns a copy of df with the indicator columns filled from the stored rows."""
+        df = df.copy()
+        if not self.rows: return df
+        rows = list(self.rows)
+        pos = pd.Index([t for t, _ in rows]).get_indexer(df['time'].to_numpy())
+        found = pos >= 0
+        columns = [c for c in rows[-1][1] if c != "close"]
+        for c in columns:
+            col = np.full(len(df), np.nan)
+            col[found] = [rows[i][1][c] for i in pos[found]]
+            df[c] = col
+        return df
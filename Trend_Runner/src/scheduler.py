@@ -0,0 +1,33 @@
+class BarScheduler:
+    """
+    The Alarm Clock ⏰. Remembers the newest bar each symbol was analyzed on.
+    Every loop it probes one bar per symbol (a 1-row copy_rates call) and only
+    hands back the symbols whose bar has rolled, so full fetch + analysis runs once
+    per candle while trailing stops and the auditor keep the fast loop cadence.
+    A symbol stays due until mark() is called, so a signal that couldn't be executed
+    yet is retried on the next loop instead of waiting a whole candle.
+    """
+    def __init__(self, timeframe):
+        self.timeframe = timeframe
+        self.last_bar = {} # symbol -> bar time (epoch seconds) it was last analyzed on
+        self.stats = {"probes": 0, "due": 0}
+
+    def due(self, broker, symbols):
+        """Returns {symbol: newest bar time} for symbols that have a bar we haven't analyzed."""
+        ready = {}
+        for symbol in symbols:
+            self.stats["probes"] += 1
+            bar_time = broker.get_last_bar_time(symbol, self.timeframe)
+            if bar_time is None: continue # No data / terminal hiccup: try again next loop
+            if self.last_bar.get(symbol) != bar_time:
+                ready[symbol] = bar_time
+        self.stats["due"] += len(ready)
+        return ready
+
+    def mark(self, symbol, bar_time):
+        """Call once the symbol's verdict for bar_time has been acted on (unmarked = due again)."""
+        self.last_bar[symbol] = bar_time
+
+    def reset(self):
+        """Makes every symbol due again (e.g. the Coach changed the recipe mid-candle)."""
+        self.last_bar.clear()
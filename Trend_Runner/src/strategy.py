@@ -5,111 +5,22 @@
 import pandas as pd
 import ta 
 import numpy as np
-import importlib
-import sys
+import os
 from datetime import datetime
+from src import indicators
+from src.indicators import IndicatorEngine
+from src.indicator_cache import IndicatorCache
+from src.state_store import StrategyStateStore
 
 # ==============================================================================
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-# 🧠 AI EXCLUSIVE ZONE (Gemini edits this via Coach)
-# The Coach (coach.py) uses Regex to surgically update this block.
-# ==============================================================================
-STRATEGY_STATE = {
-    "VERSION": "3.3",
-    "MENU": [
-        "EMA",
-        "RSI",
-        "MACD",
-        "Bol",
-        "ADX",
-        "SAR",
-        "Ichi",
-        "Kelt",
-        "Donch",
-        "Stoch",
-        "CCI",
-        "Fib",
-        "SMA",
-        "WillR",
-        "MFI",
-        "ROC",
-        "TRIX"
-    ],
-    "ACTIVE_CONCOCTION": [
-        "EMA",
-        "MACD",
-        "Stoch"
-    ],
-    "PARAMS": {
-        "EMA_FAST": 10,
-        "EMA_SLOW": 20,
-        "RSI_PERIOD": 14,
-        "RSI_LIMIT_LOW": 30,
-        "RSI_LIMIT_HIGH": 70,
-        "ATR_PERIOD": 14,
-        "ATR_MULTIPLIER": 3.0,
-        "RISK_REWARD": 2.0,
-        "ADX_THRESHOLD": 25,
-        "DONCHIAN_PERIOD": 30,
-        "KELTNER_MULT": 2.0,
-        "FIB_LOOKBACK": 100,
-        "SMA_PERIOD": 200,
-        "WILLIAMS_PERIOD": 14,
-        "MFI_PERIOD": 14,
-        "ROC_PERIOD": 12,
-        "TRIX_PERIOD": 15,
-        "MACD_FAST_PERIOD": 12,
-        "MACD_SLOW_PERIOD": 26,
-        "MACD_SIGNAL_PERIOD": 9,
-        "STOCH_K_PERIOD": 14,
-        "STOCH_D_PERIOD": 3,
-        "STOCH_SMOOTHING": 3,
-        "STOCH_LIMIT_LOW": 20,
-        "STOCH_LIMIT_HIGH": 80
-    },
-    "BENCHED_PAIRS": {
-        "EURAUD": "2026-01-30 17:06:37"
-    },
-    "MODE": "STANDARD"
-}
-# ==============================================================================
-# 🛑 END AI ZONE
+# 🧠 STRATEGY STATE lives in src/strategy_state.json (the Coach rewrites it there).
+# Plain data: re-read only when the file changes, never executed as Python.
 # ==============================================================================
+STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "strategy_state.json")
+
+# 📼 Ingredients the streaming engine reproduces exactly ('Fib' reads raw highs/lows).
+# Anything else (SAR, CCI, MFI, Bol) needs a full 'ta' pass.
+INCREMENTAL_READY = {"EMA", "SMA", "Ichi", "Donch", "ADX", "TRIX", "RSI", "MACD", "Stoch", "WillR", "ROC", "Kelt", "Fib"}
 
 class Strategy:
     """
@@ -117,8 +28,12 @@ class Strategy:
     """
     def __init__(self):
         # Initial Load
-        self.state = STRATEGY_STATE
+        self.store = StrategyStateStore(STATE_FILE)
+        self.state = self.store.get()
+        self.state_version = self.store.version
         self.update_name()
+        self.engines = {} # pair -> (recipe hash, IndicatorEngine)
+        self.indicator_cache = IndicatorCache()
 
     def update_name(self):
         # 📝 CHANGE: Removed "Darwin v3.1" prefix. Now it's just the ingredients joined by '+'.
@@ -127,22 +42,16 @@ class Strategy:
 
     def refresh_state(self):
         """
-        🛠️ HINDENBURG FIX:
-        Reloads the module itself to pick up changes made by the Coach
-        to the STRATEGY_STATE dict on disk.
+        🛠️ HINDENBURG FIX v2:
+        Picks up changes the Coach made to strategy_state.json.
+        Costs one os.stat() per loop; the JSON is only parsed when its content changed.
         """
         try:
-            # 1. Reload the current module
-            importlib.reload(sys.modules[__name__])
-            
-            # 2. Update the instance's reference to the new variable
-            # We access the module from sys.modules to get the fresh object
-            new_state = sys.modules[__name__].STRATEGY_STATE
-            self.state = new_state
-            
-            # 3. Update Name
-            self.update_name()
-            # print("   🧬 Strategy State Refreshed (Hot-Reload).")
+            state = self.store.get()
+            if self.store.version != self.state_version:
+                self.state, self.state_version = state, self.store.version
+                self.update_name()
+                # print(f"   🧬 Strategy State Refreshed (v{self.state_version}).")
         except Exception as e:
             print(f"   ⚠️ Strategy Refresh Failed: {e}")
 
@@ -249,13 +158,113 @@ class Strategy:
 
         return df
 
+    def build_indicator_engine(self):
+        """
+        📼 Streaming twin of calc_indicators (same columns, same values as 'ta').
+        Returns None when the recipe has an ingredient without an incremental form.
+        """
+        p = dict(self.state["PARAMS"])
+        recipe = list(self.state["ACTIVE_CONCOCTION"])
+        if not set(recipe) <= INCREMENTAL_READY: return None
+
+        def build():
+            stack = [indicators.ATR(p['ATR_PERIOD'], f"ATRr_{p['ATR_PERIOD']}")]
+            if "EMA" in recipe:
+                stack.append(indicators.EMA(p['EMA_FAST'], f"EMA_{p['EMA_FAST']}"))
+                stack.append(indicators.EMA(p['EMA_SLOW'], f"EMA_{p['EMA_SLOW']}"))
+            if "SMA" in recipe: stack.append(indicators.SMA(p['SMA_PERIOD'], f"SMA_{p['SMA_PERIOD']}"))
+            if "Ichi" in recipe: stack.append(indicators.Ichimoku('ISA_9', 'ISB_26'))
+            if "Donch" in recipe:
+                n = p['DONCHIAN_PERIOD']
+                stack.append(indicators.Donchian(n, f"DCU_{n}_{n}", f"DCL_{n}_{n}"))
+            if "ADX" in recipe: stack.append(indicators.ADX(14, 'ADX_14'))
+            if "TRIX" in recipe: stack.append(indicators.TRIX(p['TRIX_PERIOD'], f"TRIX_{p['TRIX_PERIOD']}"))
+            if "RSI" in recipe: stack.append(indicators.RSI(p['RSI_PERIOD'], f"RSI_{p['RSI_PERIOD']}"))
+            if "MACD" in recipe: stack.append(indicators.MACD(12, 26, 9, 'MACD_12_26_9'))
+            if "Stoch" in recipe: stack.append(indicators.Stochastic(14, 3, 'STOCHk_14_3_3', 'STOCHd_14_3_3'))
+            if "WillR" in recipe:
+                stack.append(indicators.WilliamsR(p['WILLIAMS_PERIOD'], f"WILLR_{p['WILLIAMS_PERIOD']}"))
+            if "ROC" in recipe: stack.append(indicators.ROC(p['ROC_PERIOD'], f"ROC_{p['ROC_PERIOD']}"))
+            if "Kelt" in recipe:
+                mult = p['KELTNER_MULT']
+                stack.append(indicators.Keltner(20, 10, mult, f"KCUe_20_{mult}", f"KCLe_20_{mult}"))
+            return stack
+
+        return IndicatorEngine(build)
+
+    def calc_indicators_incremental(self, pair, df, forming_last=True):
+        """
+        Same frame as calc_indicators, but only bars the pair's engine hasn't seen are computed.
+        With forming_last, the last bar is treated as the forming candle and gets re-applied
+        on the next scan; pass False for a frame of closed bars only.
+        A recipe/params change from the Coach re-warms the engine from this frame.
+        """
+        if df.empty: return df
+        key = IndicatorCache.recipe_hash(self.state)
+        cached = self.engines.get(pair)
+        if cached is None or cached[0] != key:
+            engine = self.build_indicator_engine()
+            if engine is None:
+                self.engines.pop(pair, None)
+                return self.calc_indicators(df)
+            cached = self.engines[pair] = (key, engine)
+
+        engine = cached[1]
+        engine.sync(df, forming_last=forming_last)
+        return engine.frame(df)
+
+    def indicators_for(self, pair, df, timeframe=15):
+        """
+        Indicator frame over the pair's CLOSED bars, computed at most once per closed bar and recipe.
+        The forming candle (last row of a terminal fetch) is dropped, so a cache hit is exactly
+        what a fresh compute would return and the vote never reads a half-built bar.
+        """
+        if df is None or df.empty: return df
+        closed = df.iloc[:-1]
+        if closed.empty: return closed
+        bar_time = IndicatorCache.closed_bar_time(df)
+        recipe_hash = IndicatorCache.recipe_hash(self.state)
+        frame = self.indicator_cache.get(pair, timeframe, bar_time, recipe_hash)
+        if frame is None:
+            frame = self.calc_indicators_incremental(pair, closed, forming_last=False)
+            self.indicator_cache.put(pair, timeframe, bar_time, recipe_hash, frame)
+        return frame
+
     def analyze(self, pair, broker, cloud):
+        """Standalone entry point: fetches its own bars. The scan loop uses analyze_batch instead."""
         if self.check_bench(pair): return None, None, None, None
 
         df = broker.get_data(pair, timeframe=15, n=300)
         if df is None or df.empty: return None, None, None, None
-        
-        df = self.calc_indicators(df)
+        return self.analyze_frame(pair, self.indicators_for(pair, df, timeframe=15))
+
+    def analyze_batch(self, frames, timeframe=15):
+        """
+        Votes on every pair of the cycle at once.
+        frames: {pair: OHLC DataFrame already fetched by the caller}. Each frame gets
+        one (cached) indicator pass and no extra terminal call.
+        Returns {pair: (signal, sl, tp, comment)} in the same order.
+        """
+        verdicts = {}
+        for pair, df in frames.items():
+            try:
+                if self.check_bench(pair) or df is None or df.empty:
+                    verdicts[pair] = (None, None, None, None)
+                    continue
+                verdicts[pair] = self.analyze_frame(pair, self.indicators_for(pair, df, timeframe=timeframe))
+            except Exception as e:
+                print(f"   ❌ Error {pair}: {e}")
+                verdicts[pair] = (None, None, None, None)
+        return verdicts
+
+    def analyze_frame(self, pair, df):
+        """
+        The voting booth on a pre-fetched frame that already carries the indicator columns.
+        Expects closed bars only (see indicators_for): curr is the bar that just closed.
+        """
+        if self.check_bench(pair): return None, None, None, None
+        if df is None or len(df) < 2: return None, None, None, None
+
         curr = df.iloc[-1]
         prev = df.iloc[-2]
         p = self.state["PARAMS"]
@@ -0,0 +1,115 @@
+class TradeRecord:
+    """
+    The Ticket Stub 🎫. One open trade, in fixed slots instead of a free-form dict.
+    Still answers trade['pair'] / trade.get('pnl', 0) / trade['pnl'] = x, so the
+    auditor, the weekend closer and the Sheets logger read it exactly like before.
+    Keys outside FIELDS (older memory files, future additions) ride along in `extra`.
+    """
+    FIELDS = (
+        'ticket', 'strategy', 'signal', 'pair', 'open_time',
+        'entry_price', 'stop_loss_price', 'take_profit_price', 'volume', 'spread',
+        'exit_price', 'close_time', 'pnl'
+    )
+    __slots__ = FIELDS + ('_set', 'extra')
+
+    def __init__(self, data):
+        self._set = set() # Fields that were actually given (to_dict writes back only those)
+        self.extra = {}
+        self.update(data)
+
+    def __getitem__(self, key):
+        if key in self._set: return getattr(self, key)
+        if key in self.extra: return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in TradeRecord.FIELDS:
+            setattr(self, key, value)
+            self._set.add(key)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._set or key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, data):
+        for key, value in data.items():
+            self[key] = value
+
+    def to_dict(self):
+        """Back to the plain dict the memory file has always held (same key order for known fields)."""
+        out = {key: getattr(self, key) for key in TradeRecord.FIELDS if key in self._set}
+        out.update(self.extra)
+        return out
+
+
+class OpenTradeRegistry:
+    """
+    The Guest List 📋. Open trades keyed by ticket, with a pair -> tickets index on the side.
+    Lookup, removal and "is this pair already open?" are dict hits instead of list scans.
+    Iteration follows registration order, just like the old open_bot_trades list.
+    """
+    def __init__(self, trades=()):
+        self.by_ticket = {} # ticket -> TradeRecord
+        self.by_pair = {}   # pair -> {tickets}
+        for trade in trades:
+            self.add(trade)
+
+    def __len__(self):
+        return len(self.by_ticket)
+
+    def __iter__(self):
+        # Snapshot, so callers may close trades while walking the list
+        return iter(list(self.by_ticket.values()))
+
+    def __contains__(self, ticket):
+        return ticket in self.by_ticket
+
+    def get(self, ticket):
+        return self.by_ticket.get(ticket)
+
+    def add(self, trade):
+        """Registers a trade (dict or TradeRecord). Re-adding a ticket replaces it."""
+        record = trade if isinstance(trade, TradeRecord) else TradeRecord(trade)
+        self.remove(record['ticket'])
+        self.by_ticket[record['ticket']] = record
+        self.by_pair.setdefault(record.get('pair'), set()).add(record['ticket'])
+        return record
+
+    def remove(self, ticket):
+        """Drops a trade. Returns its record, or None if it wasn't open."""
+        record = self.by_ticket.pop(ticket, None)
+        if record is None: return None
+        tickets = self.by_pair.get(record.get('pair'))
+        if tickets is not None:
+            tickets.discard(ticket)
+            if not tickets: del self.by_pair[record.get('pair')]
+        return record
+
+    def update(self, ticket, data):
+        """Patches an open trade in place (re-indexed if its pair changes). False if not open."""
+        record = self.by_ticket.get(ticket)
+        if record is None: return False
+        if 'pair' in data and data['pair'] != record.get('pair'):
+            self.remove(ticket)
+            record.update(data)
+            self.add(record)
+        else:
+            record.update(data)
+        return True
+
+    def has_pair(self, pair):
+        return pair in self.by_pair
+
+    def tickets(self):
+        return list(self.by_ticket)
+
+    def to_list(self):
+        """The open_bot_trades list as stored in the memory file."""
+        return [record.to_dict() for record in self.by_ticket.values()]
@@ -5,6 +5,7 @@ import sys
 import os
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import MetaTrader5 as mt5
 
 # -------------------------------------------------------------------------
@@ -23,8 +24,10 @@ try:
     from src.strategy import Strategy
     from src.telegram_bot import TelegramBot
     from src.coach import Coach # 🧢 The Boss
+    from src.scheduler import BarScheduler
+    from src.market_snapshot import MarketSnapshot
     # Added MAX_RISK_PCT and BLACKLIST_ASSETS to import
-    from config import TRAILING_CONFIG, CRYPTO_MARKETS, MAX_OPEN_TRADES, DEFAULT_PARAMS, MAX_RISK_PCT, BLACKLIST_ASSETS
+    from config import TRAILING_CONFIG, CRYPTO_MARKETS, MAX_OPEN_TRADES, DEFAULT_PARAMS, MAX_RISK_PCT, BLACKLIST_ASSETS, SCAN_WORKERS
     print("✅ The squad is assembled.")
 except ImportError as e:
     print(f"\n💀 CRITICAL IMPORT ERROR: {e}")
@@ -33,18 +36,28 @@ except ImportError as e:
 # -------------------------------------------------------------------------
 # 🧠 HELPER LOGIC
 # -------------------------------------------------------------------------
-def sync_balance(broker, cloud):
+def sync_balance(broker, cloud, snap):
     """
     🏦 The Banker.
     Forces the bot to look at the REAL account balance, not the memory.
     """
     if not broker.connected: return
-    account_info = mt5.account_info()
+    account_info = snap.account
     if account_info:
         real_balance = account_info.balance
         cloud.state['current_balance'] = real_balance
 
-def manage_running_trades(broker, cloud, tg_bot):
+def fetch_and_prime(pair, broker, strategy):
+    """
+    ⚡ Scan worker job: one terminal fetch + one indicator pass for a pair.
+    Runs on the scan pool; the frame lands in the strategy's indicator cache.
+    """
+    df = broker.get_data(pair, timeframe=mt5.TIMEFRAME_M15, n=300)
+    if df is None or df.empty: return None
+    strategy.indicators_for(pair, df, timeframe=mt5.TIMEFRAME_M15)
+    return df
+
+def manage_running_trades(broker, cloud, tg_bot, snap):
     """
     🏃‍♂️ The Trailer.
     1. Moves SL to break-even and trails profit (Locks in gains).
@@ -52,8 +65,8 @@ def manage_running_trades(broker, cloud, tg_bot):
     """
     if not broker.connected: return
     
-    # Get live positions
-    positions = broker.get_open_positions()
+    # Get live positions (already fetched by the audit this cycle)
+    positions = snap.positions
     if not positions: return
 
     for pos in positions:
@@ -66,7 +79,7 @@ def manage_running_trades(broker, cloud, tg_bot):
         type_op = pos.type # 0=Buy, 1=Sell
         
         # Determine Point Size (e.g. 0.00001 or 0.01)
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = snap.symbol_info(symbol)
         if not symbol_info: continue
         point = symbol_info.point
         
@@ -114,7 +127,7 @@ def manage_running_trades(broker, cloud, tg_bot):
                 
                 # 🛡️ THE FIX: Check res validity
                 if res and res.retcode == mt5.TRADE_RETCODE_DONE:
-                    tg_bot.send_msg(f"🎣 TP CHASE: {symbol} extended to {new_tp}")
+                    tg_bot.send_msg(f"🎣 TP CHASE: {symbol} extended to {new_tp}", category="trail")
 
         # --- SELL LOGIC 📉 ---
         elif type_op == 1:
@@ -153,23 +166,23 @@ def manage_running_trades(broker, cloud, tg_bot):
                 
                 # 🛡️ THE FIX: Check res validity
                 if res and res.retcode == mt5.TRADE_RETCODE_DONE:
-                    tg_bot.send_msg(f"🎣 TP CHASE: {symbol} extended to {new_tp}")
+                    tg_bot.send_msg(f"🎣 TP CHASE: {symbol} extended to {new_tp}", category="trail")
 
-def audit_trades(broker, cloud, tg_bot):
+def audit_trades(broker, cloud, tg_bot, snap):
     """
     Returns True if a trade was closed, False otherwise.
     """
     if not broker.connected: return False
 
-    memory_trades = cloud.state.get('open_bot_trades', [])
+    memory_trades = cloud.open_trades
     if not memory_trades: return False
 
-    live_positions = broker.get_open_positions() 
-    live_tickets = [p.ticket for p in live_positions]
+    live_positions = snap.positions
+    live_tickets = {p.ticket for p in live_positions}
     
     trade_closed_flag = False
 
-    for trade in memory_trades[:]:
+    for trade in memory_trades:
         ticket = trade['ticket']
         if ticket not in live_tickets:
             print(f"   🕵️ Audit: Trade {ticket} missing. Investigating...")
@@ -190,7 +203,7 @@ def audit_trades(broker, cloud, tg_bot):
     
     return trade_closed_flag
 
-def check_weekend_chill(broker, cloud, tg_bot):
+def check_weekend_chill(broker, cloud, tg_bot, snap):
     """
     🏖️ The Friday Chill Protocol
     Closes all Forex trades on Friday evening (after 20:00) AND prevents trading on Sat/Sun.
@@ -207,15 +220,14 @@ def check_weekend_chill(broker, cloud, tg_bot):
 
     # 🛑 TRIGGER CONDITION: Friday Night OR Full Weekend
     if is_friday_close or is_weekend:
-        open_trades = cloud.state.get('open_bot_trades', [])
-        for trade in open_trades[:]:
+        for trade in cloud.open_trades:
             pair = trade['pair']
             if pair not in CRYPTO_MARKETS:
                 print(f"   🏖️ Weekend Chill: Closing {pair}...")
                 
                 # Close trade
                 is_long = trade['signal'] == 'BUY'
-                if broker.close_trade(trade['ticket'], pair, trade['volume'], is_long):
+                if broker.close_trade(trade['ticket'], pair, trade['volume'], is_long, tick=snap.tick(pair)):
                     
                     # ⏳ Wait a beat for MT5 to process the history
                     time.sleep(2)
@@ -226,10 +238,10 @@ def check_weekend_chill(broker, cloud, tg_bot):
                         trade['exit_price'] = status['exit_price']
                         trade['close_time'] = status['close_time']
                         trade['pnl'] = status['pnl']
-                        tg_bot.send_msg(f"🏖️ WEEKEND EXIT: {pair}\nPnL: {trade['pnl']}")
+                        tg_bot.send_msg(f"🏖️ WEEKEND EXIT: {pair}\nPnL: {trade['pnl']}", category="weekend")
                     else:
                         # Fallback if history isn't ready yet
-                        tg_bot.send_msg(f"🏖️ WEEKEND EXIT: {pair}\n(PnL processing...)")
+                        tg_bot.send_msg(f"🏖️ WEEKEND EXIT: {pair}\n(PnL processing...)", category="weekend")
 
                     cloud.deregister_trade(trade['ticket'])
                     cloud.log_trade(trade, reason="FRIDAY_CLOSE")
@@ -248,20 +260,23 @@ def main():
     
     # 1. Initialize Components
     my_cloud = CloudManager()
+    my_cloud.log_writer.start() # ✍️ Ships any log rows left spooled by the last run
     my_broker = BrokerAPI()
     
+    # 🕊️ Telegram I/O runs on background threads; the loop only reads/writes queues
+    tg_bot = TelegramBot()
+
     # 🧢 Initialize the Coach
-    my_coach = Coach()
+    my_coach = Coach(bot=tg_bot)
     
     # 🧠 Inject Config Params into Strategy
     # FIXED: No arguments passed here! Strategy is independent.
     my_strategy = Strategy()
-    
-    tg_bot = TelegramBot()
 
     # 2. Connect to MT5
     if not my_broker.startup():
         tg_bot.send_msg("🚨 CRITICAL: MT5 Connection Failed!")
+        tg_bot.stop() # Let the alert out before we go
         sys.exit(1)
 
     tg_bot.send_msg(f"🤖 Trend Runner Online!\nStrategy: {my_strategy.name}")
@@ -270,16 +285,35 @@ def main():
     last_silence_check = time.time()
     silence_check_interval = 3600 # 1 Hour
 
+    # ⏰ Full analysis only runs when a pair's M15 candle rolls (the loop itself stays fast)
+    bar_clock = BarScheduler(mt5.TIMEFRAME_M15)
+    # ⚡ Fetch + indicators run concurrently; entries are still decided one by one below
+    scan_pool = ThreadPoolExecutor(max_workers=max(1, SCAN_WORKERS), thread_name_prefix="scan")
+    last_state_version = my_strategy.state_version
+    snap = last_snap = None
+
     # 3. Main Loop
     while True:
         try:
+            # 📸 One terminal read of positions/account/symbols, shared by every phase below
+            if snap is not None:
+                snap.close()
+                last_snap = snap # What the status report shows
+            snap = MarketSnapshot(my_broker)
+
             # Sync Real Balance
-            sync_balance(my_broker, my_cloud)
+            sync_balance(my_broker, my_cloud, snap)
             
             # 🛠️ HINDENBURG FIX: Refresh Strategy State EVERY LOOP
             # This ensures we know who is benched immediately after Coach updates the file
+            # (one stat() call per loop; the JSON is only parsed when it changed)
             my_strategy.refresh_state()
 
+            # Coach changed the strategy state mid-candle -> every pair is due again
+            if my_strategy.state_version != last_state_version:
+                bar_clock.reset()
+                last_state_version = my_strategy.state_version
+
             # Check for Telegram Commands
             cmd = tg_bot.get_latest_command()
             
@@ -293,13 +327,17 @@ def main():
                 my_cloud.save_memory()
             elif cmd == "status":
                 bal = my_cloud.state.get('current_balance', 0)
-                active_count = len(my_cloud.state.get('open_bot_trades', []))
+                active_count = len(my_cloud.open_trades)
+                ic = my_strategy.indicator_cache.stats
+                reads = last_snap.summary() if last_snap else "n/a"
                 status_msg = (
                     f"📊 STATUS REPORT\n"
                     f"State: {my_cloud.state.get('status')}\n"
                     f"Balance: ${bal}\n"
                     f"Open Trades: {active_count}\n"
-                    f"Strategy: {my_strategy.name}"
+                    f"Strategy: {my_strategy.name}\n"
+                    f"Indicator Cache: {ic['hits']} hits / {ic['misses']} recomputes\n"
+                    f"Terminal Reads (last cycle): {reads}"
                 )
                 tg_bot.send_msg(status_msg)
             elif cmd == "coach":
@@ -310,11 +348,15 @@ def main():
                 # 🧢 MANUAL FORCE CONSULTATION
                 tg_bot.send_msg("🤖 Force-Consulting the Oracle...")
                 my_coach.consult_oracle(force=True)
+            elif cmd == "rollback":
+                # ⏪ UNDO THE LAST COACH WRITE (picked up by refresh_state next loop)
+                tg_bot.send_msg(my_coach.rollback_strategy())
 
             # Audit existing trades (Logs closes)
             # If a trade closed, we wake up the Coach immediately 🧢
-            if audit_trades(my_broker, my_cloud, tg_bot):
+            if audit_trades(my_broker, my_cloud, tg_bot, snap):
                 print("   🧢 Trade Closed. Waking up the Coach...")
+                my_cloud.log_writer.flush() # The Coach reads the tape from the sheet
                 my_coach.consult_oracle()
             
             # --- 🗣️ SILENCE CHECK ---
@@ -324,10 +366,10 @@ def main():
                 last_silence_check = time.time()
             
             # Manage Running Trades (Trailing SL) 🏃‍♂️
-            manage_running_trades(my_broker, my_cloud, tg_bot)
+            manage_running_trades(my_broker, my_cloud, tg_bot, snap)
             
             # Check Weekend Protocol
-            is_weekend_chill = check_weekend_chill(my_broker, my_cloud, tg_bot)
+            is_weekend_chill = check_weekend_chill(my_broker, my_cloud, tg_bot, snap)
 
             # If paused, skip analysis
             if my_cloud.state.get('status') == 'paused':
@@ -335,15 +377,13 @@ def main():
                 continue
 
             # --- 🛡️ RISK GUARD: MAX TRADES CHECK ---
-            current_open_trades = my_cloud.state.get('open_bot_trades', [])
-            if len(current_open_trades) >= MAX_OPEN_TRADES:
+            if len(my_cloud.open_trades) >= MAX_OPEN_TRADES:
                 time.sleep(10)
                 continue
 
-            active_trade_pairs = [t['pair'] for t in current_open_trades]
-
             # Market Scan
             active_pairs = my_cloud.state.get('active_pairs', [])
+            candidates = []
             for pair in active_pairs:
                 
                 # 🚫 STRICT FILTER: NO METALS OR CRYPTO
@@ -353,91 +393,113 @@ def main():
                     continue
 
                 # 🛑 DUPLICATE CHECK
-                if pair in active_trade_pairs: continue
+                if my_cloud.open_trades.has_pair(pair): continue
 
                 # 🏖️ WEEKEND FILTER: Skip Forex on Friday night
                 if is_weekend_chill and pair not in CRYPTO_MARKETS:
                     continue
 
+                # 🚫 BENCH: Don't spend a terminal call on a pair that can't trade
+                if my_strategy.check_bench(pair): continue
+                candidates.append(pair)
+
+            # ⏰ Only pairs whose candle rolled since their last analysis get the full fetch
+            # ⚡ ...spread across the scan pool, then collected back in pair order
+            jobs = [
+                (pair, bar_time, scan_pool.submit(fetch_and_prime, pair, my_broker, my_strategy))
+                for pair, bar_time in bar_clock.due(my_broker, candidates).items()
+            ]
+            frames = {}
+            bar_times = {}
+            for pair, bar_time, job in jobs:
                 try:
-                    # Get Data
-                    df = my_broker.get_data(pair, timeframe=mt5.TIMEFRAME_M15, n=200)
-                    if df is None or df.empty: continue
+                    df = job.result()
+                    if df is None: continue
+                    frames[pair] = df
+                    bar_times[pair] = bar_time
+                except Exception as e:
+                    print(f"   ❌ Error {pair}: {e}")
+
+            # Analyze every fetched pair in one pass (votes on the bar that just closed)
+            verdicts = my_strategy.analyze_batch(frames, timeframe=mt5.TIMEFRAME_M15)
 
-                    # Analyze
-                    df = my_strategy.calc_indicators(df)
-                    signal, sl, tp, comment = my_strategy.analyze(pair, my_broker, my_cloud)
+            # ⏰ A pair is only marked once its verdict has been acted on. A signal that didn't
+            # become a trade (order rejected, Risk Police abort, MAX_OPEN_TRADES) stays due and
+            # is retried next loop on the same closed bar (a cache hit) until the bar rolls.
+            for pair, (signal, sl, tp, comment) in verdicts.items():
+                if not signal:
+                    bar_clock.mark(pair, bar_times[pair])
+                    continue
 
-                    if signal:
-                        # 1. Calc Basic Volume
-                        volume = my_broker.calc_position_size(pair, sl, risk=0.01)
+                try:
+                    # 1. Calc Basic Volume
+                    volume = my_broker.calc_position_size(pair, sl, risk=0.01)
+                    
+                    # 2. 👮 RISK POLICE: Force SL to adhere to Max Risk %
+                    current_balance = my_cloud.state.get('current_balance', 100) # Default 100 to be safe
+                    risk_limit_usd = current_balance * MAX_RISK_PCT
+                    
+                    is_long = (signal == 'BUY')
+                    
+                    # Validate and possibly Adjust SL
+                    new_sl, was_adjusted = my_broker.validate_sl_for_risk(
+                        pair, is_long, frames[pair]['close'].iloc[-1], sl, volume, risk_limit_usd
+                    )
+                    
+                    if was_adjusted:
+                        print(f"   👮 Risk Police: Tightened SL for {pair} to limit loss to ${risk_limit_usd:.2f}")
                         
-                        # 2. 👮 RISK POLICE: Force SL to adhere to Max Risk %
-                        current_balance = my_cloud.state.get('current_balance', 100) # Default 100 to be safe
-                        risk_limit_usd = current_balance * MAX_RISK_PCT
+                        # Safety check: Is SL inside the spread?
+                        tick = snap.tick(pair)
+                        current_price = tick.ask if is_long else tick.bid
+                        dist = abs(current_price - new_sl)
+                        spread_val = tick.ask - tick.bid
                         
-                        is_long = (signal == 'BUY')
+                        # If New SL is dangerously close (less than 2x spread), abort trade
+                        if dist < (spread_val * 2):
+                            print(f"   🚫 Trade Aborted: Forced SL is too close to spread.")
+                            continue
+                            
+                        sl = new_sl # Apply the new SL
+
+                    # Execute
+                    result = my_broker.execute_trade(pair, signal, volume, sl, tp, comment)
+                    
+                    if result:
+                        bar_clock.mark(pair, bar_times[pair])
+                        server_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        print(f"   ✅ Trade Executed! Ticket: {result.order}")
                         
-                        # Validate and possibly Adjust SL
-                        new_sl, was_adjusted = my_broker.validate_sl_for_risk(
-                            pair, is_long, df['close'].iloc[-1], sl, volume, risk_limit_usd
-                        )
+                        # 🛠️ ROUNDING FOR MESSAGE
+                        clean_sl = round(sl, 5)
+                        clean_tp = round(tp, 5)
                         
-                        if was_adjusted:
-                            print(f"   👮 Risk Police: Tightened SL for {pair} to limit loss to ${risk_limit_usd:.2f}")
-                            
-                            # Safety check: Is SL inside the spread?
-                            tick = mt5.symbol_info_tick(pair)
-                            current_price = tick.ask if is_long else tick.bid
-                            dist = abs(current_price - new_sl)
-                            spread_val = tick.ask - tick.bid
-                            
-                            # If New SL is dangerously close (less than 2x spread), abort trade
-                            if dist < (spread_val * 2):
-                                print(f"   🚫 Trade Aborted: Forced SL is too close to spread.")
-                                continue
-                                
-                            sl = new_sl # Apply the new SL
-
-                        # Execute
-                        result = my_broker.execute_trade(pair, signal, volume, sl, tp, comment)
+                        tg_bot.send_msg(f"🚀 ENTRY: {pair} {signal}\nSL: {clean_sl}\nTP: {clean_tp}\n🧪 {my_strategy.name}")
+
+                        # Capture spread at Open
+                        spread_at_open = my_broker.get_spread(pair)
+
+                        trade_data = {
+                            'ticket': result.order,
+                            'strategy': comment,
+                            'signal': signal,
+                            'pair': pair,
+                            'open_time': server_time,
+                            'entry_price': result.price,
+                            'stop_loss_price': sl,
+                            'take_profit_price': tp,
+                            'volume': volume,
+                            'spread': spread_at_open, # 📝 Log Spread here
+                            'exit_price': 0,
+                            'pnl': 0
+                        }
+                        # Log Entry (Memory Only now)
+                        my_cloud.log_trade(trade_data, reason="OPEN")
+                        # Save to Memory for the Auditor
+                        my_cloud.register_trade(trade_data)
                         
-                        if result:
-                            server_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            print(f"   ✅ Trade Executed! Ticket: {result.order}")
-                            
-                            # 🛠️ ROUNDING FOR MESSAGE
-                            clean_sl = round(sl, 5)
-                            clean_tp = round(tp, 5)
-                            
-                            tg_bot.send_msg(f"🚀 ENTRY: {pair} {signal}\nSL: {clean_sl}\nTP: {clean_tp}\n🧪 {my_strategy.name}")
-
-                            # Capture spread at Open
-                            spread_at_open = my_broker.get_spread(pair)
-
-                            trade_data = {
-                                'ticket': result.order,
-                                'strategy': comment,
-                                'signal': signal,
-                                'pair': pair,
-                                'open_time': server_time,
-                                'entry_price': result.price,
-                                'stop_loss_price': sl,
-                                'take_profit_price': tp,
-                                'volume': volume,
-                                'spread': spread_at_open, # 📝 Log Spread here
-                                'exit_price': 0,
-                                'pnl': 0
-                            }
-                            # Log Entry (Memory Only now)
-                            my_cloud.log_trade(trade_data, reason="OPEN")
-                            # Save to Memory for the Auditor
-                            my_cloud.register_trade(trade_data)
-                            
-                            active_trade_pairs.append(pair)
-                            
-                            if len(my_cloud.state.get('open_bot_trades', [])) >= MAX_OPEN_TRADES:
-                                break 
+                        if len(my_cloud.open_trades) >= MAX_OPEN_TRADES:
+                            break 
 
                 except Exception as e:
                     print(f"   ❌ Error {pair}: {e}")
@@ -446,12 +508,15 @@ def main():
 
         except KeyboardInterrupt:
             print("\n🛑 Manual Shutdown.")
+            scan_pool.shutdown(wait=False)
+            my_cloud.log_writer.stop()
+            tg_bot.stop()
             break # Exit the loop only on manual command
         except Exception as e:
             # 🛡️ THE CRASH CATCHER
             # We catch it, print it, notify you, and KEEP GOING.
             print(f"📉 CRITICAL CRASH: {e}")
-            tg_bot.send_msg(f"📉 CRITICAL CRASH: {e}")
+            tg_bot.send_msg(f"📉 CRITICAL CRASH: {e}", category="crash") # Same error every 10s -> one alert + a count
             time.sleep(10) # Pause for 10s to avoid spamming the logs if it's a persistent error
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+from collections import Counter
+import MetaTrader5 as mt5
+
+class MarketSnapshot:
+    """
+    The Polaroid 📸. One look at the terminal per loop iteration.
+    Positions and account info are fetched the first time a phase asks for them and then
+    shared by every later phase of the same cycle (balance sync, audit, trailer, weekend
+    closer, entries). Symbol specs and quotes come from the broker's caches
+    (BrokerAPI.symbol_meta / get_tick), so they're shared across cycles too.
+    A new cycle = a new snapshot. `calls` counts the terminal reads this cycle actually
+    made (the broker's included); `hits` the ones the caches saved.
+    Not for the scan pool: it's filled and read on the main thread only.
+    """
+    def __init__(self, broker):
+        self.broker = broker
+        self.own_calls = Counter()
+        self.own_hits = 0
+        self.broker_calls_at_start = Counter(broker.calls)
+        self.broker_hits_at_start = broker.cache_hits
+        self._positions = None
+        self._account = None
+        self.frozen = None # (calls, hits) once the cycle is over
+
+    def _fetch(self, name, fn):
+        self.own_calls[name] += 1
+        return fn()
+
+    @property
+    def positions(self):
+        """Open positions (empty tuple when disconnected or none)."""
+        if self._positions is None:
+            if not self.broker.connected: return ()
+            self._positions = tuple(self._fetch("positions_get", mt5.positions_get) or ())
+        else:
+            self.own_hits += 1
+        return self._positions
+
+    @property
+    def account(self):
+        if self._account is None:
+            if not self.broker.connected: return None
+            self._account = self._fetch("account_info", mt5.account_info)
+        else:
+            self.own_hits += 1
+        return self._account
+
+    def symbol_info(self, symbol):
+        """Static specs only (point, digits, contract size, filling mode): see BrokerAPI.symbol_meta."""
+        return self.broker.symbol_meta(symbol)
+
+    def tick(self, symbol):
+        return self.broker.get_tick(symbol)
+
+    def close(self):
+        """Ends the cycle: the counts stop following the broker's (the next cycle's reads aren't ours)."""
+        if self.frozen is None: self.frozen = (self.calls, self.hits)
+
+    @property
+    def calls(self):
+        if self.frozen: return self.frozen[0]
+        calls = Counter(self.own_calls)
+        calls.update(self.broker.calls - self.broker_calls_at_start)
+        return calls
+
+    @property
+    def hits(self):
+        if self.frozen: return self.frozen[1]
+        return self.own_hits + self.broker.cache_hits - self.broker_hits_at_start
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def summary(self):
+        """e.g. '2 calls (positions_get 1, account_info 1), 5 saved'"""
+        calls = self.calls
+        if not calls: return f"0 calls, {self.hits} saved"
+        parts = ", ".join(f"{name} {n}" for name, n in calls.items())
+        return f"{sum(calls.values())} calls ({parts}), {self.hits} saved"
@@ -1,6 +1,7 @@
 import streamlit as st
 from datetime import datetime, timedelta
 from src.cloud import CloudManager
+from src.task_queue import make_task_queue
 from config import USER_DEFAULT_MARKETS
 
 # 🛡️ CLOUD GUARD: BacktestEngine is a Windows-only diva, so it stays on the VM.
@@ -40,6 +41,8 @@ st.write("Commander, welcome back to the bridge. Execution stays on the ground,
 # Initialize the CloudManager (Safe for Linux/Streamlit Cloud)
 if 'cloud' not in st.session_state:
     st.session_state.cloud = CloudManager()
+if 'task_queue' not in st.session_state:
+    st.session_state.task_queue = make_task_queue(st.session_state.cloud)
 
 # --- SYSTEM MONITORING ---
 with st.expander("📡 System Status & Instructions", expanded=True):
@@ -100,12 +103,18 @@ with st.sidebar:
     menu = ["EMA", "RSI", "MACD", "Bol", "ADX", "SAR", "Ichi", "Kelt", "Donch", "Stoch", "CCI", "SMA", "WillR", "MFI", "ROC", "TRIX"]
     concoction = st.multiselect("Ingredients", menu, default=["EMA", "MACD", "Bol"])
 
+    st.divider()
+
+    st.write("🏎️ **Simulation Engine**")
+    st.caption("Vectorized = one indicator pass, way faster on M1/M5. Legacy = the OG bar-by-bar loop (A/B reference).")
+    engine = st.radio("Engine", ["legacy", "vectorized", "incremental"], index=0, horizontal=True)
+
 # --- MAIN: Mission Control ---
 st.subheader("🚀 Mission Control")
 
 # Visual feedback for the current setup
 if pairs:
-    st.write(f"**Current Payload:** {len(pairs)} Pairs | {tf} Timeframe | {strictness} Strictness")
+    st.write(f"**Current Payload:** {len(pairs)} Pairs | {tf} Timeframe | {strictness} Strictness | {engine} Engine")
 else:
     st.write("⚠️ *No pairs selected. Standing by for orders...*")
 
@@ -115,10 +124,11 @@ if st.button("🔥 DEPLOY MISSION TO WORKER"):
     else:
         with st.spinner("🛰️ Contacting C2 Center (Google Sheets)..."):
             # The 'Snitch' returns success and the actual error if things go south
-            success, error_msg = st.session_state.cloud.request_task(
+            success, error_msg = st.session_state.task_queue.submit(
                 pairs, tf, concoction, strictness, 
                 start_date.strftime("%Y-%m-%d"), 
-                end_date.strftime("%Y-%m-%d")
+                end_date.strftime("%Y-%m-%d"),
+                engine=engine
             )
             
             if success:
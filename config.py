@@ -40,6 +40,46 @@ SHEET_URL = get_secret("GOOGLE_SHEET_URL")
 HARDCODED_LOT_SIZE = 0.01
 CONTRACT_SIZE = 100000 
 
+# --- WORKER FAN-OUT ---
+# How many CPU cores the worker VM may use to simulate pairs in parallel.
+# 0 / unset = all cores. 1 = run everything in the main process (easy debugging).
+WORKER_PROCESSES_RAW = get_secret("WORKER_PROCESSES", "0")
+WORKER_PROCESSES = int(WORKER_PROCESSES_RAW) if str(WORKER_PROCESSES_RAW).isdigit() else 0
+WORKER_PROCESSES = WORKER_PROCESSES or (os.cpu_count() or 1)
+
+# --- LOCAL HISTORY CACHE ---
+# Where the worker keeps already-downloaded OHLC bars. Set to "off" to always hit MT5.
+HISTORY_CACHE_DIR = get_secret("HISTORY_CACHE_DIR", "history_cache")
+if str(HISTORY_CACHE_DIR).strip().lower() in ("", "off", "none", "0"):
+    HISTORY_CACHE_DIR = None
+
+# --- TASK QUEUE ---
+# 'sheets' = the 'Tasks' tab (Streamlit Cloud <-> VM). 'sqlite' = a local file, for dev/tests without Google.
+TASK_QUEUE_BACKEND = str(get_secret("TASK_QUEUE_BACKEND", "sheets")).strip().lower()
+TASK_QUEUE_DB = get_secret("TASK_QUEUE_DB", "tasks.db")
+TASK_POLL_MIN = 5        # Seconds between polls while missions keep coming
+TASK_POLL_MAX = 120      # Idle polls back off (x2 each miss) up to this
+# Sheets claim: seconds between writing our stamp and reading it back. A claim is only exclusive
+# if a competing worker's write lands within this window; a slower Sheets write can still hand
+# the task to two workers (then the later lease check drops one). Raise it if that ever shows up.
+TASK_CLAIM_SETTLE = 5
+TASK_LEASE_SECONDS = 600 # A claim expires unless its worker heartbeats (every 1/3 of this); then it's re-queued
+
+# --- SHEETS HANDLE CACHE ---
+# Seconds a spreadsheet/worksheet handle is reused before it's looked up again.
+SHEETS_HANDLE_TTL_RAW = get_secret("SHEETS_HANDLE_TTL", "600")
+SHEETS_HANDLE_TTL = int(SHEETS_HANDLE_TTL_RAW) if str(SHEETS_HANDLE_TTL_RAW).isdigit() else 600
+
+# --- TELEGRAM HUB (telegram_hub.py) ---
+# One process per host polls Telegram for all bots and sends their messages from one queue.
+# Bots opt in by setting TELEGRAM_HUB to the same address in their .env.
+TELEGRAM_BOT_TOKEN = get_secret("TELEGRAM_BOT_TOKEN")
+TELEGRAM_CHAT_ID = get_secret("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = get_secret("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_HUB_ADDRESS = get_secret("TELEGRAM_HUB_ADDRESS", "127.0.0.1:8765")
+TELEGRAM_POLL_TIMEOUT = 25   # Long-poll seconds per getUpdates
+TELEGRAM_SEND_INTERVAL = 1.0 # Seconds between outbound messages (Telegram allows ~1/s per chat)
+
 # --- GOOGLE CREDS LOGIC (The Alpha Logic) ---
 # We're making this super robust because Streamlit Cloud can be a diva.
 raw_creds = get_secret("GOOGLE_CREDS")
@@ -2,47 +2,64 @@ import pandas as pd
 import numpy as np
 from src.broker import BrokerAPI
 from src.cloud import CloudManager
+from src.batch_stats import BatchStats
 from src.strategy import Strategy
+from src.exit_resolver import ExitResolver, EXIT_REASONS, EXIT_DATA_END
 from config import HARDCODED_LOT_SIZE, CONTRACT_SIZE
 from datetime import datetime
 
-class BacktestEngine:
-    """The Scientist 🧪. Handles simulation and coordinates the reporting."""
-    def __init__(self):
-        self.broker = BrokerAPI()
-        self.cloud = CloudManager()
-        self.strategy = Strategy()
+# 🏎️ SIMULATION ENGINES
+# 'legacy'     -> Re-runs the full indicator stack on a growing window every bar (O(n²)).
+# 'vectorized' -> One indicator pass over the whole frame + array voting (O(n)).
+# 'incremental' -> Streams bars one at a time through the IndicatorEngine, like the live loop (O(n)).
+ENGINE_MODES = ["legacy", "vectorized", "incremental"]
+DEFAULT_ENGINE = "legacy"
 
-    def startup(self):
-        return self.broker.startup()
+class NoProgress:
+    """Stand-in progress bar for headless runs (worker VM / pool processes)."""
+    def progress(self, val): pass
 
-    def init_batch(self, pairs, tf, recipe, strictness, start_date, end_date):
-        """Initializes the Batch with the correct column order for 'Batches' metadata."""
-        batch_id = int(self.cloud.get_next_batch_id())
-        
-        date_range = f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
-        
-        # Order: Batch no. | Date Range | Selected Pairs | TimeFrame | Strategy | Strictness
-        metadata = [
-            batch_id,
-            date_range,
-            ", ".join(pairs),
-            tf,
-            "+".join(recipe),
-            str(strictness)
-        ]
-        self.cloud.log_batch_meta(metadata)
-        self.cloud.create_batch_sheet(batch_id)
-        return batch_id
+class PairSimulator:
+    """
+    The Lab Rat 🐀. Pure simulation: OHLC DataFrame in, trade rows out.
+    No MT5 and no Sheets in here, so it can be shipped to worker processes.
+    """
+    def __init__(self):
+        self.strategy = Strategy()
 
-    def run_show(self, batch_id, pair, tf_str, start_dt, end_dt, recipe, strictness, progress_bar):
+    def run(self, df, batch_id, pair, recipe, strictness, progress_bar=None, engine=DEFAULT_ENGINE):
         self.strategy.state['ACTIVE_CONCOCTION'] = recipe
         self.strategy.update_name()
-        
-        df = self.broker.get_historical_data(pair, tf_str, start_dt, end_dt)
-        if df is None or len(df) < 300:
-            return f"❌ {pair}: Not enough data."
+        progress_bar = progress_bar or NoProgress()
+
+        if engine == "vectorized":
+            return self._simulate_vectorized(df, batch_id, pair, strictness, progress_bar)
+        if engine == "incremental":
+            return self._simulate_vectorized(df, batch_id, pair, strictness, progress_bar,
+                                             booth=self.strategy.analyze_backtest_incremental)
+        return self._simulate_legacy(df, batch_id, pair, strictness, progress_bar)
+
+    def _trade_row(self, batch_id, strat_name, pair, signal, entry_bar, sl_p, tp_p, exit_price, close_t, reason):
+        """Builds one 'Batch_{id}' row. Shared by both engines so the output is identical."""
+        entry_price, open_time = float(entry_bar['close']), str(entry_bar['time'])
+        spread = int(entry_bar.get('spread', 0))
 
+        sl_dist, tp_dist = abs(entry_price - sl_p), abs(tp_p - entry_price)
+        sl_money = float(round(sl_dist * HARDCODED_LOT_SIZE * CONTRACT_SIZE, 2))
+        tp_money = float(round(tp_dist * HARDCODED_LOT_SIZE * CONTRACT_SIZE, 2))
+
+        pnl_pts = (exit_price - entry_price) if signal == 'BUY' else (entry_price - exit_price)
+        pnl_money = float(round(pnl_pts * HARDCODED_LOT_SIZE * CONTRACT_SIZE, 2))
+
+        return [
+            int(batch_id), str(strat_name), str(pair), str(signal), open_time,
+            round(entry_price, 5), round(float(sl_p), 5), sl_money,
+            float(HARDCODED_LOT_SIZE), spread, tp_money, round(float(tp_p), 5),
+            round(exit_price, 5), close_t, pnl_money, str(reason)
+        ]
+
+    def _simulate_legacy(self, df, batch_id, pair, strictness, progress_bar):
+        """The original bar-by-bar loop. Kept as the A/B reference for the vectorized engine."""
         trades = []
         warmup, total_bars = 250, len(df)
         
@@ -53,12 +70,6 @@ class BacktestEngine:
             
             if signal:
                 entry_bar = df.iloc[idx]
-                entry_price, open_time = float(entry_bar['close']), str(entry_bar['time'])
-                spread = int(entry_bar.get('spread', 0))
-                
-                sl_dist, tp_dist = abs(entry_price - sl_p), abs(tp_p - entry_price)
-                sl_money = float(round(sl_dist * HARDCODED_LOT_SIZE * CONTRACT_SIZE, 2))
-                tp_money = float(round(tp_dist * HARDCODED_LOT_SIZE * CONTRACT_SIZE, 2))
                 
                 exit_found = False
                 for j in range(idx + 1, total_bars):
@@ -73,43 +84,148 @@ class BacktestEngine:
                         exit_found = True
                             
                     if exit_found:
-                        pnl_pts = (exit_price - entry_price) if signal == 'BUY' else (entry_price - exit_price)
-                        pnl_money = float(round(pnl_pts * HARDCODED_LOT_SIZE * CONTRACT_SIZE, 2))
-                        
-                        trades.append([
-                            int(batch_id), str(strat_name), str(pair), str(signal), open_time,
-                            round(entry_price, 5), round(float(sl_p), 5), sl_money,
-                            float(HARDCODED_LOT_SIZE), spread, tp_money, round(float(tp_p), 5),
-                            round(exit_price, 5), close_t, pnl_money, str(reason)
-                        ])
+                        trades.append(self._trade_row(
+                            batch_id, strat_name, pair, signal, entry_bar, sl_p, tp_p, exit_price, close_t, reason
+                        ))
                         idx = j
                         break
                 
                 if not exit_found:
                     last_bar = df.iloc[-1]
-                    last_price = float(last_bar['close'])
-                    pnl_pts = (last_price - entry_price) if signal == 'BUY' else (entry_price - last_price)
-                    trades.append([
-                        int(batch_id), str(strat_name), str(pair), str(signal), open_time,
-                        round(entry_price, 5), round(float(sl_p), 5), sl_money,
-                        float(HARDCODED_LOT_SIZE), spread, tp_money, round(float(tp_p), 5),
-                        round(last_price, 5), str(last_bar['time']), 
-                        float(round(pnl_pts * HARDCODED_LOT_SIZE * CONTRACT_SIZE, 2)), "Data Ended"
-                    ])
+                    trades.append(self._trade_row(
+                        batch_id, strat_name, pair, signal, entry_bar, sl_p, tp_p,
+                        float(last_bar['close']), str(last_bar['time']), "Data Ended"
+                    ))
                     break
             
             idx += 1
             if idx % 20 == 0:
                 progress_bar.progress(min((idx - warmup) / (total_bars - warmup), 1.0))
 
+        return trades
+
+    def _simulate_vectorized(self, df, batch_id, pair, strictness, progress_bar, booth=None):
+        """
+        ⚡ Single-pass engine. Signals for every bar come from one indicator pass and
+        the ExitResolver settles every candidate entry in one batch. The only
+        sequential part left is chaining trades: after an exit, the next entry is
+        the first firing bar after the exit bar.
+        'booth' swaps the signal source (the incremental engine streams the same signals).
+        """
+        trades = []
+        warmup, total_bars = 250, len(df)
+        strat_name = self.strategy.name
+
+        booth = booth or self.strategy.analyze_backtest_vectorized
+        signals, sl_arr, tp_arr = booth(df, strictness)
+        fire_idx = np.flatnonzero(signals)
+        fire_idx = fire_idx[fire_idx >= warmup]
+        if len(fire_idx) == 0:
+            progress_bar.progress(1.0)
+            return trades
+
+        resolver = ExitResolver(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+        exit_idx, exit_px, reasons = resolver.resolve(
+            fire_idx, signals[fire_idx] > 0, sl_arr[fire_idx], tp_arr[fire_idx]
+        )
+
+        k = 0
+        while k < len(fire_idx):
+            idx = int(fire_idx[k])
+            signal = 'BUY' if signals[idx] > 0 else 'SELL'
+            j = int(exit_idx[k])
+
+            trades.append(self._trade_row(
+                batch_id, strat_name, pair, signal, df.iloc[idx], float(sl_arr[idx]), float(tp_arr[idx]),
+                float(exit_px[k]), str(df['time'].iloc[j]), EXIT_REASONS[int(reasons[k])]
+            ))
+            if reasons[k] == EXIT_DATA_END: break
+
+            # Next trade can only open on a bar AFTER the exit bar
+            k = int(np.searchsorted(fire_idx, j, side='right'))
+            progress_bar.progress(min((j + 1 - warmup) / (total_bars - warmup), 1.0))
+
+        progress_bar.progress(1.0)
+        return trades
+
+def simulate_pair(job):
+    """
+    Process-pool entry point 🏭. Must live at module level so Windows 'spawn' can pickle it.
+    job = (batch_id, pair, bars, recipe, strictness, engine) -> returns (pair, trades)
+    """
+    batch_id, pair, bars, recipe, strictness, engine = job
+    df = bars.to_frame() # Memory-mapped bars arrive as a file reference, not a copy
+    return pair, PairSimulator().run(df, batch_id, pair, recipe, strictness, engine=engine)
+
+class BacktestEngine:
+    """The Scientist 🧪. Handles simulation and coordinates the reporting."""
+    def __init__(self):
+        self.broker = BrokerAPI()
+        self.cloud = CloudManager()
+        self.simulator = PairSimulator()
+        self.strategy = self.simulator.strategy
+        self.batch_stats = {} # batch_id -> BatchStats, fed as each pair's trades are published
+
+    def startup(self):
+        return self.broker.startup()
+
+    def init_batch(self, pairs, tf, recipe, strictness, start_date, end_date):
+        """
+        Initializes the Batch with the correct column order for 'Batches' metadata.
+        The batch no. is reserved by creating its 'Batch_N' tab first: only one worker can
+        create a given tab, so two workers that sniffed the same next id never share a batch.
+        The loser re-sniffs and tries again.
+        """
+        batch_id = int(self.cloud.get_next_batch_id())
+        for attempt in range(20):
+            created = self.cloud.create_batch_sheet(batch_id)
+            if created is not False: break # True = ours; None = offline / Sheets error (nothing to share)
+            print(f"   ↪️ Batch {batch_id} is taken. Trying the next no...")
+            batch_id = max(batch_id + 1, int(self.cloud.get_next_batch_id()))
+        else:
+            raise RuntimeError(f"Could not reserve a batch no. (last tried {batch_id})")
+        
+        date_range = f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+        
+        # Order: Batch no. | Date Range | Selected Pairs | TimeFrame | Strategy | Strictness
+        metadata = [
+            batch_id,
+            date_range,
+            ", ".join(pairs),
+            tf,
+            "+".join(recipe),
+            str(strictness)
+        ]
+        self.cloud.log_batch_meta(metadata)
+        self.batch_stats[batch_id] = BatchStats()
+        return batch_id
+
+    def fetch_history(self, pair, tf_str, start_dt, end_dt):
+        """Pulls the pair's OHLC once as Bars. Returns None if there isn't enough to warm up."""
+        bars = self.broker.get_historical_bars(pair, tf_str, start_dt, end_dt)
+        if bars is None or len(bars) < 300:
+            return None
+        return bars
+
+    def publish_results(self, batch_id, pair, trades):
+        """Streams one pair's trades to the batch tab and returns the status line."""
         if trades:
             self.cloud.log_batch_results(batch_id, trades)
+            self.batch_stats.setdefault(batch_id, BatchStats()).add_trades(trades)
             return f"✅ {pair}: {len(trades)} trades logged."
-        
+
         return f"😴 {pair}: No confluence found."
 
+    def run_show(self, batch_id, pair, tf_str, start_dt, end_dt, recipe, strictness, progress_bar, engine=DEFAULT_ENGINE):
+        bars = self.fetch_history(pair, tf_str, start_dt, end_dt)
+        if bars is None:
+            return f"❌ {pair}: Not enough data."
+
+        trades = self.simulator.run(bars.to_frame(), batch_id, pair, recipe, strictness, progress_bar, engine)
+        return self.publish_results(batch_id, pair, trades)
+
     def finalize_show(self, batch_id):
-        self.cloud.finalize_batch_stats(batch_id)
+        self.cloud.finalize_batch_stats(batch_id, self.batch_stats.pop(batch_id, None))
 
     def shutdown(self):
-        self.broker.disconnect()
\ No newline at end of file
+        self.broker.disconnect()
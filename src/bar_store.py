@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import itertools
+import numpy as np
+import pandas as pd
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# 📐 FIXED-WIDTH LAYOUT (Same fields and dtypes MT5 hands back from copy_rates_*)
+BAR_COLUMNS = {
+    "time": "<i8", "open": "<f8", "high": "<f8", "low": "<f8", "close": "<f8",
+    "tick_volume": "<u8", "spread": "<i4", "real_volume": "<u8"
+}
+
+class Bars:
+    """
+    A slice of OHLC history stored column by column 📊.
+    Disk-backed slices are read-only memory maps, so every process that opens the same
+    file shares one copy through the OS page cache. Pickling a disk-backed slice only
+    ships (folder, generation, row range); the receiver re-maps the file itself.
+    """
+    def __init__(self, columns, source=None, lo=0):
+        self.columns = columns
+        self.source = source # (folder, generation) when backed by a BarStore file
+        self.lo = lo         # Row offset of this slice inside the source file
+
+    @classmethod
+    def from_rates(cls, rates):
+        """Wraps a raw MT5 rates array (in memory, nothing shared)."""
+        return cls({c: np.ascontiguousarray(rates[c]).astype(dt, copy=False) for c, dt in BAR_COLUMNS.items()})
+
+    def __len__(self):
+        return len(self.columns["time"])
+
+    def slice_time(self, start_ts, end_ts):
+        """Zero-copy view of the bars with start_ts <= time <= end_ts."""
+        times = self.columns["time"]
+        lo = int(np.searchsorted(times, start_ts, side="left"))
+        hi = int(np.searchsorted(times, end_ts, side="right"))
+        return Bars({c: arr[lo:hi] for c, arr in self.columns.items()}, self.source, self.lo + lo)
+
+    def to_frame(self):
+        """
+        Builds the same DataFrame BrokerAPI always returned, without copying the columns.
+        'time' is a datetime64[s] view over the stored epoch seconds.
+        """
+        data = {c: np.asarray(arr) for c, arr in self.columns.items()}
+        data["time"] = data["time"].view("datetime64[s]")
+        return pd.DataFrame(data, copy=False)
+
+    def __getstate__(self):
+        if self.source is None:
+            return {"columns": self.columns, "source": None, "lo": 0}
+        return {"columns": None, "source": self.source, "lo": self.lo, "rows": len(self)}
+
+    def __setstate__(self, state):
+        self.source, self.lo = state["source"], state["lo"]
+        if self.source is None:
+            self.columns = state["columns"]
+            return
+        folder, gen = self.source
+        hi = self.lo + state["rows"]
+        self.columns = {c: BarStore.map_column(folder, c, gen)[self.lo:hi] for c in BAR_COLUMNS}
+
+_write_ids = itertools.count(1) # Per-process counter for unique generation / tmp names
+
+class FolderLock:
+    """
+    Cross-process lock on one symbol folder 🔐 (several worker.py processes share the cache).
+    Held only for the meta.json swap and the prune, never while bars are being written.
+    """
+    def __init__(self, folder):
+        self.path = os.path.join(folder, "meta.lock")
+        self.f = None
+
+    def __enter__(self):
+        self.f = open(self.path, "a+")
+        if fcntl:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        else:
+            self.f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass # LK_LOCK gives up after ~10 s: keep waiting
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl:
+                fcntl.flock(self.f, fcntl.LOCK_UN)
+            else:
+                self.f.seek(0)
+                msvcrt.locking(self.f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.f.close()
+
+class BarStore:
+    """
+    The Vault 🏦. One folder per symbol+timeframe, one '.npy' file per column.
+    Each rewrite lands in a new generation ('close.<seq>_<pid>_<n>.npy', unique per writer,
+    so concurrent workers never write the same file) and 'meta.json' is swapped last under
+    the folder lock, so readers (and Windows, which refuses to replace a mapped file) never
+    see a torn write. Old generations are only pruned once several newer ones exist AND
+    they've sat untouched for PRUNE_GRACE, so a pickled (folder, gen) in a pool job still opens.
+    """
+    KEEP_GENERATIONS = 3 # Newest generations always kept
+    PRUNE_GRACE = 3600   # Seconds a generation file is kept after it was written, whatever its age rank
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def folder(self, symbol, tf_str):
+        return os.path.join(self.root_dir, f"{symbol}_{tf_str}")
+
+    @staticmethod
+    def map_column(folder, column, gen):
+        return np.load(os.path.join(folder, f"{column}.{gen}.npy"), mmap_mode="r", allow_pickle=False)
+
+    def open(self, symbol, tf_str):
+        """Returns (bars, start_ts, end_ts) or (None, None, None) when nothing usable is on disk."""
+        folder = self.folder(symbol, tf_str)
+        try:
+            with open(os.path.join(folder, "meta.json"), "r") as f:
+                meta = json.load(f)
+            gen = str(meta["gen"])
+            columns = {c: self.map_column(folder, c, gen) for c in BAR_COLUMNS}
+            return Bars(columns, (folder, gen)), int(meta["start"]), int(meta["end"])
+        except Exception:
+            return None, None, None
+
+    def write(self, symbol, tf_str, columns, start_ts, end_ts):
+        """Persists a new generation and returns it re-opened as read-only maps."""
+        folder = self.folder(symbol, tf_str)
+        os.makedirs(folder, exist_ok=True)
+        meta_path = os.path.join(folder, "meta.json")
+        try:
+            with open(meta_path, "r") as f:
+                seq = self.gen_seq(json.load(f)["gen"]) + 1
+        except Exception:
+            seq = 1
+        write_id = next(_write_ids)
+        gen = f"{seq}_{os.getpid()}_{write_id}" # seq orders generations, pid + counter make the name ours alone
+
+        for c, dt in BAR_COLUMNS.items():
+            np.save(os.path.join(folder, f"{c}.{gen}.npy"), np.asarray(columns[c], dtype=dt), allow_pickle=False)
+        with FolderLock(folder):
+            tmp_path = f"{meta_path}.{os.getpid()}_{write_id}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"gen": gen, "start": int(start_ts), "end": int(end_ts), "rows": len(columns["time"])}, f)
+            os.replace(tmp_path, meta_path)
+            self._prune(folder, current=gen)
+        return Bars({c: self.map_column(folder, c, gen) for c in BAR_COLUMNS}, (folder, gen))
+
+    @staticmethod
+    def gen_seq(gen):
+        """'12_4521_3' -> 12 (plain '12' from older caches too). None if it isn't a generation."""
+        head = str(gen).split("_")[0]
+        return int(head) if head.isdigit() else None
+
+    def _prune(self, folder, current):
+        """
+        Drops generations that are neither current, among the KEEP_GENERATIONS newest, nor
+        younger than PRUNE_GRACE (which also covers another writer's files not yet in meta.json).
+        Mapped files that Windows won't delete just stay until next time.
+        """
+        gens = {} # gen -> (seq, newest mtime, [paths])
+        for name in os.listdir(folder):
+            parts = name.split(".")
+            if len(parts) != 3 or parts[2] != "npy": continue
+            seq = self.gen_seq(parts[1])
+            if seq is None: continue
+            path = os.path.join(folder, name)
+            try: mtime = os.path.getmtime(path)
+            except OSError: continue
+            _, newest, paths = gens.get(parts[1], (seq, 0, []))
+            gens[parts[1]] = (seq, max(newest, mtime), paths + [path])
+
+        ranked = sorted(gens, key=lambda g: gens[g][:2], reverse=True)
+        keep = set(ranked[:self.KEEP_GENERATIONS]) | {current}
+        cutoff = time.time() - self.PRUNE_GRACE
+        for gen in ranked:
+            if gen in keep or gens[gen][1] > cutoff: continue
+            for path in gens[gen][2]:
+                try: os.remove(path)
+                except OSError: pass
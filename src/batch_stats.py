@@ -0,0 +1,51 @@
+class BatchStats:
+    """
+    The Scoreboard 🧮. Running totals for one batch, fed with the trade rows as they're logged,
+    so finalizing a batch never has to read the 'Batch_{id}' tab back.
+    Same math as the old sheet read-back (PnL is column O of a trade row).
+    """
+    PNL_COL = 14
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.total_pnl = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0 # Stored positive
+
+    def add_trades(self, rows):
+        for row in rows:
+            self.add_pnl(row[self.PNL_COL])
+
+    def add_pnl(self, pnl):
+        pnl = float(pnl)
+        self.count += 1
+        self.total_pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.gross_loss += abs(pnl)
+
+    @property
+    def win_rate(self):
+        return (self.wins / self.count * 100) if self.count > 0 else 0
+
+    @property
+    def profit_factor(self):
+        if self.gross_loss > 0: return self.gross_profit / self.gross_loss
+        return self.gross_profit if self.wins else 1.0
+
+    def footer_rows(self):
+        """The summary block under the trades (leading blank spacer row included)."""
+        return [
+            [],
+            ["COUNT:", self.count],
+            ["GROSS PNL:", round(self.total_pnl, 2)],
+            ["WIN RATE:", f"{round(self.win_rate, 2)}%"],
+            ["PROFIT FACTOR:", round(self.profit_factor, 2)]
+        ]
+
+    def master_cells(self):
+        """Trade count | Batch PnL | Profit Factor | % Win Rate for the 'Batches' row (G:J)."""
+        return [self.count, round(self.total_pnl, 2), round(self.profit_factor, 2), f"{round(self.win_rate, 1)}%"]
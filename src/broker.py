@@ -1,6 +1,7 @@
 import MetaTrader5 as mt5
-import pandas as pd
-from config import MT5_PATH, MT5_LOGIN, MT5_PASSWORD, MT5_SERVER
+from src.history_cache import HistoryCache
+from src.bar_store import Bars
+from config import MT5_PATH, MT5_LOGIN, MT5_PASSWORD, MT5_SERVER, HISTORY_CACHE_DIR
 
 class BrokerAPI:
     """The Middleman 👔. Fetches real OHLC from the backtest terminal."""
@@ -11,6 +12,8 @@ class BrokerAPI:
             "M15": mt5.TIMEFRAME_M15, "M30": mt5.TIMEFRAME_M30,
             "H1": mt5.TIMEFRAME_H1, "H4": mt5.TIMEFRAME_H4, "D1": mt5.TIMEFRAME_D1
         }
+        self.cache = HistoryCache(HISTORY_CACHE_DIR) if HISTORY_CACHE_DIR else None
+        self.last_fetch = None # {'disk_bars', 'terminal_bars', 'segments'} of the latest pull
 
     def startup(self):
         # Using the specific MT5_PATH from config.py
@@ -23,18 +26,32 @@ class BrokerAPI:
         self.connected = True
         return True, "✅ MT5 Grid Connected"
 
-    def get_historical_data(self, symbol, tf_str, start_dt, end_dt):
+    def get_historical_bars(self, symbol, tf_str, start_dt, end_dt):
+        """Returns the range as a Bars slice (memory-mapped when the history cache is on)."""
         if not self.connected: return None
         # Defaulting to M15 if something goes sideways, but M30 is now officially mapped
         tf = self.tf_map.get(tf_str, mt5.TIMEFRAME_M15)
         
+        if self.cache:
+            # Cache files are keyed by the MT5 timeframe actually used (unknown tf_str -> M15)
+            tf_key = next((k for k, v in self.tf_map.items() if v == tf), tf_str)
+            bars, self.last_fetch = self.cache.fetch(
+                symbol, tf_key, start_dt, end_dt,
+                lambda seg_from, seg_to: mt5.copy_rates_range(symbol, tf, seg_from, seg_to)
+            )
+            return bars
+
         rates = mt5.copy_rates_range(symbol, tf, start_dt, end_dt)
+        self.last_fetch = {"disk_bars": 0, "terminal_bars": 0 if rates is None else len(rates), "segments": 1}
         if rates is None or len(rates) == 0:
             return None
-            
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        return df
+        return Bars.from_rates(rates)
+
+    def get_historical_data(self, symbol, tf_str, start_dt, end_dt):
+        bars = self.get_historical_bars(symbol, tf_str, start_dt, end_dt)
+        if bars is None or len(bars) == 0:
+            return None
+        return bars.to_frame()
 
     def disconnect(self):
         mt5.shutdown()
\ No newline at end of file
@@ -1,7 +1,17 @@
+import time
 import gspread
 from google.oauth2.service_account import Credentials
-from config import GOOGLE_CREDS_DICT, SHEET_URL, USER_DEFAULT_MARKETS
-from datetime import datetime
+from config import GOOGLE_CREDS_DICT, SHEET_URL, USER_DEFAULT_MARKETS, SHEETS_HANDLE_TTL, TASK_CLAIM_SETTLE
+from src.batch_stats import BatchStats
+from datetime import datetime, timedelta
+
+# 'Tasks' tab layout (A..K). Rows are read by position, so older tabs without the
+# trailing headers still line up.
+TASK_COLUMNS = ["Timestamp", "Status", "Pairs", "TF", "Recipe", "Strictness", "Start", "End", "Engine", "Worker", "Lease Until"]
+
+def lease_stamp(seconds_from_now=0):
+    """UTC 'YYYY-MM-DD HH:MM:SS' (sorts as text, so leases compare without parsing)."""
+    return (datetime.utcnow() + timedelta(seconds=seconds_from_now)).strftime("%Y-%m-%d %H:%M:%S")
 
 class CloudManager:
     """The Chief Aesthetic Officer 🎨. Handles communication between UI and Ground Worker."""
@@ -9,6 +19,12 @@ class CloudManager:
         self.client = None
         self.authenticated = False
         self.last_error = ""
+        # 🗂️ Handle cache: every open_by_url / worksheet() lookup is a Sheets API call
+        self._sheet = None      # (Spreadsheet, fetched_at)
+        self._tabs = {}         # title -> (Worksheet, fetched_at)
+        self._batch_rows = {}   # batch_id -> its row on the 'Batches' tab (from log_batch_meta)
+        self._cursors = {}      # batch tab title -> next free row (1-based), so we never read it back
+        self._grid_rows = {}    # batch tab title -> rows the tab's grid currently has
         self.setup()
 
     def setup(self):
@@ -27,12 +43,60 @@ class CloudManager:
             )
             self.client = gspread.authorize(creds)
             # Test the link immediately to ensure we aren't ghosted
-            self.client.open_by_url(SHEET_URL)
+            self._spreadsheet()
             self.authenticated = True
         except Exception as e:
             self.last_error = str(e)
             self.authenticated = False
 
+    def _spreadsheet(self):
+        """The Motherboard handle, re-opened only after SHEETS_HANDLE_TTL seconds."""
+        if self._sheet and time.time() - self._sheet[1] < SHEETS_HANDLE_TTL:
+            return self._sheet[0]
+        sheet = self.client.open_by_url(SHEET_URL)
+        self._sheet = (sheet, time.time())
+        self._tabs.clear() # Tab handles belong to the old spreadsheet object
+        return sheet
+
+    def _worksheet(self, title):
+        """Cached tab lookup. Raises gspread's WorksheetNotFound like sheet.worksheet() does."""
+        sheet = self._spreadsheet()
+        cached = self._tabs.get(title)
+        if cached and time.time() - cached[1] < SHEETS_HANDLE_TTL:
+            return cached[0]
+        return self._remember(sheet.worksheet(title))
+
+    def _remember(self, ws):
+        """Caches a tab handle we just got (looked up or freshly created)."""
+        self._tabs[ws.title] = (ws, time.time())
+        return ws
+
+    def _drop_handles(self, error):
+        """A 404 / permission error means a cached handle may be stale: forget them all."""
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        stale_types = (gspread.exceptions.WorksheetNotFound, gspread.exceptions.SpreadsheetNotFound)
+        if status in (403, 404) or isinstance(error, stale_types):
+            self._sheet = None
+            self._tabs.clear()
+            self._cursors.clear() # Tab may have been edited / recreated: re-read once
+            self._grid_rows.clear()
+
+    def _grow_grid(self, ws, last_row):
+        """appendDimension request(s) so `last_row` fits (sheet.batch_update would reject it otherwise)."""
+        grid = self._grid_rows.get(ws.title, ws.row_count)
+        if last_row <= grid: return []
+        extra = max(last_row - grid, 1000) # Grow in chunks like the tab's own 1000-row default
+        self._grid_rows[ws.title] = grid + extra
+        return [{"appendDimension": {"sheetId": ws.id, "dimension": "ROWS", "length": extra}}]
+
+    @staticmethod
+    def _cell(value, fmt):
+        """One CellData for updateCells (typed like append_rows' RAW input)."""
+        if isinstance(value, bool): entered = {"boolValue": value}
+        elif isinstance(value, (int, float)): entered = {"numberValue": value}
+        else: entered = {"stringValue": str(value)}
+        return {"userEnteredValue": entered, "userEnteredFormat": fmt}
+
     def _set_dropdown_request(self, sheet_id, start_row, end_row, start_col, end_col, options):
         """Helper to create a data validation request for the Google Sheets API."""
         return {
@@ -55,18 +119,18 @@ class CloudManager:
         }
 
     # --- 🛰️ MISSION CONTROL (Streamlit Side) ---
-    def request_task(self, pairs, tf, recipe, strictness, start_date, end_date):
+    def request_task(self, pairs, tf, recipe, strictness, start_date, end_date, engine="legacy"):
         """Drops a mission into the 'Tasks' sheet. Returns (Success, ErrorMsg)."""
         if not self.authenticated: 
             return False, f"Not authenticated: {self.last_error}"
             
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
+            sheet = self._spreadsheet()
             try:
-                ws = sheet.worksheet("Tasks")
+                ws = self._worksheet("Tasks")
             except:
-                ws = sheet.add_worksheet(title="Tasks", rows="1000", cols="10")
-                ws.append_row(["Timestamp", "Status", "Pairs", "TF", "Recipe", "Strictness", "Start", "End"])
+                ws = self._remember(sheet.add_worksheet(title="Tasks", rows="1000", cols=str(len(TASK_COLUMNS))))
+                ws.append_row(TASK_COLUMNS)
             
             ws.append_row([
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -76,42 +140,122 @@ class CloudManager:
                 "+".join(recipe),
                 strictness,
                 start_date,
-                end_date
+                end_date,
+                engine
             ])
             return True, ""
         except Exception as e:
+            self._drop_handles(e)
             return False, str(e)
 
     # --- 🚜 GROUND WORKER LOGIC (Worker Side) ---
-    def get_pending_tasks(self):
-        """Worker checks if the Commander has sent any new orders."""
+    def get_task_rows(self, start_row=2):
+        """Tasks from `start_row` down, in one ranged read. Returns [(row_idx, task_dict)]."""
         if not self.authenticated: return []
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
-            ws = sheet.worksheet("Tasks")
-            all_tasks = ws.get_all_records()
-            return [(idx + 2, task) for idx, task in enumerate(all_tasks) if task.get('Status') == 'PENDING']
-        except: return []
+            ws = self._worksheet("Tasks")
+            values = ws.get(f"A{start_row}:K")
+            width = len(TASK_COLUMNS)
+            return [
+                (start_row + i, dict(zip(TASK_COLUMNS, list(row[:width]) + [""] * (width - len(row)))))
+                for i, row in enumerate(values)
+            ]
+        except Exception as e:
+            self._drop_handles(e)
+            return []
 
-    def update_task_status(self, row_idx, status):
-        """Worker updates the status (RUNNING, COMPLETED, ERROR)."""
-        if not self.authenticated: return
+    def _task_cells(self, ws, row_idx):
+        """Status..Lease Until (B..K) of one task row as a padded list."""
+        values = ws.get(f"B{row_idx}:K{row_idx}")
+        row = list(values[0]) if values else []
+        return row + [""] * (10 - len(row))
+
+    def claim_task(self, row_idx, worker_id, lease_seconds):
+        """
+        PENDING -> RUNNING stamped with our worker id and a lease expiry. Sheets has no
+        compare-and-swap, so: check it's still PENDING, write, wait TASK_CLAIM_SETTLE seconds,
+        read the stamp back. Two workers racing for a row both see the last writer's id,
+        so only one walks away with it.
+        That only holds if the competing write lands within TASK_CLAIM_SETTLE seconds of ours:
+        a write delayed past the read-back can still leave two workers believing they hold
+        the task. The loser then finds out at its first heartbeat (renew_lease -> False).
+        """
+        if not self.authenticated: return False
+        try:
+            ws = self._worksheet("Tasks")
+            if ws.col_count < len(TASK_COLUMNS): ws.resize(cols=len(TASK_COLUMNS)) # Pre-lease tabs stop at J
+            if self._task_cells(ws, row_idx)[0] != "PENDING": return False
+            ws.batch_update([
+                {"range": f"B{row_idx}", "values": [["RUNNING"]]},
+                {"range": f"J{row_idx}:K{row_idx}", "values": [[worker_id, lease_stamp(lease_seconds)]]}
+            ])
+            time.sleep(TASK_CLAIM_SETTLE)
+            stamp = ws.get(f"J{row_idx}")
+            return bool(stamp and stamp[0] and stamp[0][0] == worker_id)
+        except Exception as e:
+            self._drop_handles(e)
+            return False
+
+    def renew_lease(self, row_idx, worker_id, lease_seconds):
+        """
+        💓 Heartbeat: pushes our lease forward. False if the task is no longer ours
+        (it expired and someone re-queued it), None if Sheets couldn't be reached.
+        """
+        if not self.authenticated: return None
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
-            ws = sheet.worksheet("Tasks")
-            ws.update_cell(row_idx, 2, status)
-        except: pass
+            ws = self._worksheet("Tasks")
+            cells = self._task_cells(ws, row_idx)
+            if cells[0] != "RUNNING" or cells[8] != worker_id: return False
+            ws.batch_update([{"range": f"K{row_idx}", "values": [[lease_stamp(lease_seconds)]]}])
+            return True
+        except Exception as e:
+            self._drop_handles(e)
+            return None
+
+    def requeue_task(self, row_idx, worker_id, lease_until):
+        """Expired lease -> back to PENDING, but only if nobody touched the row since we saw it."""
+        if not self.authenticated: return False
+        try:
+            ws = self._worksheet("Tasks")
+            cells = self._task_cells(ws, row_idx)
+            if cells[0] != "RUNNING" or cells[8] != worker_id or cells[9] != lease_until: return False
+            ws.batch_update([
+                {"range": f"B{row_idx}", "values": [["PENDING"]]},
+                {"range": f"J{row_idx}:K{row_idx}", "values": [["", ""]]}
+            ])
+            return True
+        except Exception as e:
+            self._drop_handles(e)
+            return False
+
+    def finish_task(self, row_idx, worker_id, status):
+        """Final status (COMPLETED / ERROR / FAILED), written only while we still hold the task."""
+        if not self.authenticated: return False
+        try:
+            ws = self._worksheet("Tasks")
+            owner = self._task_cells(ws, row_idx)[8]
+            if owner != worker_id:
+                print(f"⚠️ Task row {row_idx} now belongs to '{owner}'. Not overwriting its status.")
+                return False
+            ws.batch_update([
+                {"range": f"B{row_idx}", "values": [[status]]},
+                {"range": f"K{row_idx}", "values": [[""]]} # Lease released
+            ])
+            return True
+        except Exception as e:
+            self._drop_handles(e)
+            return False
 
     # --- 📊 TACTICAL LOGGING (The Alpha Logic) ---
     def get_next_batch_id(self):
         """Sniffs out the next ID and ensures the 'Batches' tab is aesthetic."""
         if not self.authenticated: return 1
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
+            sheet = self._spreadsheet()
             try:
-                ws = sheet.worksheet("Batches")
+                ws = self._worksheet("Batches")
             except:
-                ws = sheet.add_worksheet(title="Batches", rows="1000", cols="10")
+                ws = self._remember(sheet.add_worksheet(title="Batches", rows="1000", cols="10"))
                 headers = ["Batch no.", "Date Range", "Selected Pairs", "TimeFrame", "Strategy", "Strictness", "Trade count", "Batch PnL", "Profit Factor", "% Win Rate"]
                 ws.append_row(headers)
                 ws.format('A1:J1', {
@@ -126,28 +270,44 @@ class CloudManager:
             col_a = ws.col_values(1)
             numeric_ids = [int(val) for val in col_a[1:] if str(val).isdigit()]
             return max(numeric_ids) + 1 if numeric_ids else 1
-        except: return 1
+        except Exception as e:
+            self._drop_handles(e)
+            return 1
 
     def log_batch_meta(self, data):
-        """Logs the strategy setup and ensures it appends inside the table."""
+        """
+        Logs the strategy setup and ensures it appends inside the table.
+        Other workers may pick the same empty row at the same moment, so the row is claimed
+        like a task: write, wait TASK_CLAIM_SETTLE seconds, read the batch no. back, and move
+        on to the next empty row if another batch landed there.
+        """
         if not self.authenticated: return
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
-            ws = sheet.worksheet("Batches")
-            
-            # Find the first truly empty row in Column A to avoid overwriting Batch 1
-            col_a = ws.col_values(1)
-            row_idx = 2 # Start below header
-            for i, val in enumerate(col_a):
-                if i > 0: # Skip header
-                    if not val or str(val).strip() == "":
-                        row_idx = i + 1
-                        break
-                    row_idx = i + 2 # If we hit the end, it's next row
+            sheet = self._spreadsheet()
+            ws = self._worksheet("Batches")
             
-            # Use update instead of append_row to force it into the specific slot
-            range_label = f"A{row_idx}:F{row_idx}"
-            ws.update(range_label, [data])
+            for attempt in range(5):
+                # Find the first truly empty row in Column A to avoid overwriting Batch 1
+                col_a = ws.col_values(1)
+                row_idx = 2 # Start below header
+                for i, val in enumerate(col_a):
+                    if i > 0: # Skip header
+                        if not val or str(val).strip() == "":
+                            row_idx = i + 1
+                            break
+                        row_idx = i + 2 # If we hit the end, it's next row
+                
+                # Use update instead of append_row to force it into the specific slot
+                range_label = f"A{row_idx}:F{row_idx}"
+                ws.update(range_label, [data])
+                time.sleep(TASK_CLAIM_SETTLE)
+                stamp = ws.get(f"A{row_idx}")
+                if stamp and stamp[0] and stamp[0][0] == str(data[0]): break
+                print(f"   ↪️ Batches row {row_idx} was taken by another worker. Trying the next one...")
+            else:
+                print(f"❌ Batch Meta Error: no free 'Batches' row for batch {data[0]}")
+                return
+            self._batch_rows[str(data[0])] = row_idx
             
             ws.format(f'A{row_idx}:J{row_idx}', {
                 'borders': {'top': {'style': 'SOLID'}, 'bottom': {'style': 'SOLID'}, 'left': {'style': 'SOLID'}, 'right': {'style': 'SOLID'}},
@@ -157,101 +317,135 @@ class CloudManager:
             # Re-apply dropdown for the new row
             requests = [self._set_dropdown_request(ws.id, row_idx - 1, row_idx, 5, 6, ['Low', 'Medium', 'High'])]
             sheet.batch_update({"requests": requests})
-        except Exception as e: print(f"❌ Batch Meta Error: {e}")
+        except Exception as e:
+            self._drop_handles(e)
+            print(f"❌ Batch Meta Error: {e}")
 
     def create_batch_sheet(self, batch_id):
-        """Creates a dedicated tab for the individual trades with conditional formatting."""
-        if not self.authenticated: return
+        """
+        Creates a dedicated tab for the individual trades with conditional formatting.
+        The tab doubles as the batch no. reservation: Sheets rejects a duplicate title, so
+        exactly one worker can create 'Batch_N'. An existing tab is never reused.
+        Returns True (created, it's ours), False (already exists: pick another id), None (error).
+        """
+        if not self.authenticated: return None
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
+            sheet = self._spreadsheet()
             name = f"Batch_{batch_id}"
-            try: sheet.worksheet(name)
-            except:
-                ws = sheet.add_worksheet(title=name, rows="1000", cols="16")
-                ws.append_row(["Batch ID", "Strategy", "Pair", "Signal", "Time Open", "Entry Point", "SL Price", "SL Money", "Lot size", "Spreads", "TP Money", "TP Price", "Exit Point", "Time Closed", "PnL", "Close Reason"])
-                ws.freeze(rows=1)
-                ws.format('A1:P1', {
-                    'textFormat': {'bold': True, 'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}},
-                    'backgroundColor': {'red': 0.1, 'green': 0.35, 'blue': 0.25}
-                })
+            try:
+                self._worksheet(name)
+                return False # Another worker's batch (or a leftover): never append into it
+            except gspread.exceptions.WorksheetNotFound:
+                pass
+            try:
+                ws = self._remember(sheet.add_worksheet(title=name, rows="1000", cols="16"))
+            except gspread.exceptions.APIError as e:
+                if "already exists" in str(e): return False # Lost the race for this id
+                raise
+            ws.append_row(["Batch ID", "Strategy", "Pair", "Signal", "Time Open", "Entry Point", "SL Price", "SL Money", "Lot size", "Spreads", "TP Money", "TP Price", "Exit Point", "Time Closed", "PnL", "Close Reason"])
+            self._cursors[name] = 2 # Trades start right under the header
+            self._grid_rows[name] = 1000
+            ws.freeze(rows=1)
+            ws.format('A1:P1', {
+                'textFormat': {'bold': True, 'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0}},
+                'backgroundColor': {'red': 0.1, 'green': 0.35, 'blue': 0.25}
+            })
                 
-                requests = [
-                    {
-                        "addConditionalFormatRule": {
-                            "rule": {
-                                "ranges": [{"sheetId": ws.id, "startRowIndex": 1, "endRowIndex": 1000, "startColumnIndex": 14, "endColumnIndex": 15}],
-                                "booleanRule": {
-                                    "condition": {"type": "NUMBER_GREATER", "values": [{"userEnteredValue": "0"}]},
-                                    "format": {"backgroundColor": {"green": 0.8, "red": 0.4, "blue": 0.4}}
-                                }
-                            },
-                            "index": 0
-                        }
-                    },
-                    {
-                        "addConditionalFormatRule": {
-                            "rule": {
-                                "ranges": [{"sheetId": ws.id, "startRowIndex": 1, "endRowIndex": 1000, "startColumnIndex": 14, "endColumnIndex": 15}],
-                                "booleanRule": {
-                                    "condition": {"type": "NUMBER_LESS", "values": [{"userEnteredValue": "0"}]},
-                                    "format": {"backgroundColor": {"red": 0.8, "green": 0.4, "blue": 0.4}}
-                                }
-                            },
-                            "index": 1
-                        }
+            requests = [
+                {
+                    "addConditionalFormatRule": {
+                        "rule": {
+                            "ranges": [{"sheetId": ws.id, "startRowIndex": 1, "endRowIndex": 1000, "startColumnIndex": 14, "endColumnIndex": 15}],
+                            "booleanRule": {
+                                "condition": {"type": "NUMBER_GREATER", "values": [{"userEnteredValue": "0"}]},
+                                "format": {"backgroundColor": {"green": 0.8, "red": 0.4, "blue": 0.4}}
+                            }
+                        },
+                        "index": 0
                     }
-                ]
-                sheet.batch_update({"requests": requests})
-        except Exception as e: print(f"❌ Create Sheet Error: {e}")
+                },
+                {
+                    "addConditionalFormatRule": {
+                        "rule": {
+                            "ranges": [{"sheetId": ws.id, "startRowIndex": 1, "endRowIndex": 1000, "startColumnIndex": 14, "endColumnIndex": 15}],
+                            "booleanRule": {
+                                "condition": {"type": "NUMBER_LESS", "values": [{"userEnteredValue": "0"}]},
+                                "format": {"backgroundColor": {"red": 0.8, "green": 0.4, "blue": 0.4}}
+                            }
+                        },
+                        "index": 1
+                    }
+                }
+            ]
+            sheet.batch_update({"requests": requests})
+            return True
+        except Exception as e:
+            self._drop_handles(e)
+            print(f"❌ Create Sheet Error: {e}")
+            return None
 
     def log_batch_results(self, batch_id, data):
-        """Streams trade results into the batch tab with clean borders."""
-        if not self.authenticated: return
+        """
+        Streams trade results into the batch tab with clean borders.
+        Values + borders (+ extra grid rows when needed) go out as ONE batch_update,
+        written at our own row cursor instead of re-downloading the tab to find the end.
+        """
+        if not self.authenticated or not data: return
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
-            ws = sheet.worksheet(f"Batch_{batch_id}")
-            start_row = len(ws.get_all_values()) + 1
-            ws.append_rows(data)
+            ws = self._worksheet(f"Batch_{batch_id}")
+            start_row = self._cursors.get(ws.title)
+            if start_row is None: start_row = len(ws.col_values(1)) + 1 # Unknown tab: one column read
             end_row = start_row + len(data) - 1
-            ws.format(f'A{start_row}:P{end_row}', {
-                'borders': {'top': {'style': 'SOLID'}, 'bottom': {'style': 'SOLID'}, 'left': {'style': 'SOLID'}, 'right': {'style': 'SOLID'}}
+            
+            solid = {'style': 'SOLID'}
+            fmt = {'borders': {'top': solid, 'bottom': solid, 'left': solid, 'right': solid}}
+            requests = self._grow_grid(ws, end_row)
+            requests.append({
+                "updateCells": {
+                    "start": {"sheetId": ws.id, "rowIndex": start_row - 1, "columnIndex": 0},
+                    "rows": [{"values": [self._cell(v, fmt) for v in row]} for row in data],
+                    "fields": "userEnteredValue,userEnteredFormat.borders"
+                }
             })
-        except Exception as e: print(f"❌ Results Log Error: {e}")
+            self._spreadsheet().batch_update({"requests": requests})
+            self._cursors[ws.title] = end_row + 1
+        except Exception as e:
+            self._grid_rows.pop(f"Batch_{batch_id}", None) # Growth may not have happened
+            self._drop_handles(e)
+            print(f"❌ Results Log Error: {e}")
 
-    def finalize_batch_stats(self, batch_id):
-        """Calculates Win Rate, PF, and PnL. Updates Master sheet."""
+    def finalize_batch_stats(self, batch_id, stats=None):
+        """
+        Writes the summary footer and the 'Batches' master row: one values update each, since
+        the footer goes in RAW (its "52.5%" stays text) and the master cells USER_ENTERED.
+        `stats` is the BatchStats the backtester kept while logging; without it we fall back
+        to reading the batch tab back once.
+        """
         if not self.authenticated: return
         try:
-            sheet = self.client.open_by_url(SHEET_URL)
-            ws_batch = sheet.worksheet(f"Batch_{batch_id}")
-            all_data = ws_batch.get_all_records()
-            if not all_data: return
-            
-            total_trades = len(all_data)
-            pnl_list = [float(row['PnL']) for row in all_data]
-            total_pnl = sum(pnl_list)
+            ws_batch = self._worksheet(f"Batch_{batch_id}")
+            if stats is None:
+                stats = BatchStats()
+                for row in ws_batch.get_all_records(): stats.add_pnl(row['PnL'])
+            if not stats.count: return
             
-            profits = [p for p in pnl_list if p > 0]
-            losses = [abs(l) for l in pnl_list if l < 0]
+            # The footer block goes right under the trades (our cursor, else header + count)
+            footer = stats.footer_rows()
+            first_row = self._cursors.get(ws_batch.title, stats.count + 2)
+            last_row = first_row + len(footer) - 1
+            grow = self._grow_grid(ws_batch, last_row)
+            if grow: self._spreadsheet().batch_update({"requests": grow})
+            footer_range = f"'{ws_batch.title}'!A{first_row}:B{last_row}"
+            self._spreadsheet().values_batch_update({"valueInputOption": "RAW", "data": [{"range": footer_range, "values": footer}]})
             
-            win_rate = (len(profits) / total_trades * 100) if total_trades > 0 else 0
-            pf = (sum(profits) / sum(losses)) if sum(losses) > 0 else (sum(profits) if profits else 1.0)
-            
-            # Summary footer
-            ws_batch.append_row([])
-            ws_batch.append_row(["COUNT:", total_trades])
-            ws_batch.append_row(["GROSS PNL:", round(total_pnl, 2)])
-            ws_batch.append_row(["WIN RATE:", f"{round(win_rate, 2)}%"])
-            ws_batch.append_row(["PROFIT FACTOR:", round(pf, 2)])
-            
-            # Update Master List
-            ws_main = sheet.worksheet("Batches")
-            rows = ws_main.get_all_values()
-            for idx, row in enumerate(rows):
-                if row[0] == str(batch_id):
-                    ws_main.update_cell(idx + 1, 7, total_trades)
-                    ws_main.update_cell(idx + 1, 8, round(total_pnl, 2))
-                    ws_main.update_cell(idx + 1, 9, round(pf, 2))
-                    ws_main.update_cell(idx + 1, 10, f"{round(win_rate, 1)}%")
-                    break
-        except Exception as e: print(f"❌ Finalize Stats Error: {e}")
\ No newline at end of file
+            # Update Master List (row remembered by log_batch_meta, else one column read)
+            master_row = self._batch_rows.get(str(batch_id))
+            if master_row is None:
+                col_a = self._worksheet("Batches").col_values(1)
+                master_row = next((idx + 1 for idx, val in enumerate(col_a) if val == str(batch_id)), None)
+            if master_row is not None:
+                data = [{"range": f"'Batches'!G{master_row}:J{master_row}", "values": [stats.master_cells()]}]
+                self._spreadsheet().values_batch_update({"valueInputOption": "USER_ENTERED", "data": data})
+        except Exception as e:
+            self._drop_handles(e)
+            print(f"❌ Finalize Stats Error: {e}")
@@ -0,0 +1,87 @@
+import numpy as np
+from datetime import datetime, timedelta
+from src.bar_store import BarStore, Bars, BAR_COLUMNS
+
+class HistoryCache:
+    """
+    The Hoarder 💾. Keeps OHLC bars we already paid the terminal for.
+    Bars live in a BarStore (one memory-mappable file per column) and meta.json records
+    the contiguous [start, end] epoch range we trust. Bounds use dt.timestamp(), the same
+    conversion MT5 applies to copy_rates_range args.
+    """
+    # Coverage never extends past this edge (forming candle / server clock drift).
+    # Newer bars are still stored so the window stays one mapped slice, but get re-fetched.
+    SAFETY_MARGIN = timedelta(days=1)
+
+    def __init__(self, cache_dir):
+        self.store = BarStore(cache_dir)
+        self.stats = {"requests": 0, "full_hits": 0, "disk_bars": 0, "terminal_bars": 0, "terminal_calls": 0}
+
+    def fetch(self, symbol, tf_str, start_dt, end_dt, download):
+        """
+        Serves [start_dt, end_dt] from disk, calling download(from_dt, to_dt) only for the
+        missing head/tail segments. Returns (bars, report) where bars is a Bars slice.
+        If any segment fails, bars is None and report['failed'] is set: a window with a hole
+        would publish a backtest over a shorter range than the one requested.
+        """
+        self.stats["requests"] += 1
+        start_ts, end_ts = int(start_dt.timestamp()), int(end_dt.timestamp())
+        safe_ts = int((datetime.now() - self.SAFETY_MARGIN).timestamp())
+
+        cached, cov_start, cov_end = self.store.open(symbol, tf_str)
+
+        # Coverage only ever grows as one contiguous block, so the gaps are just head + tail
+        if cached is None:
+            segments = [(start_ts, end_ts)]
+        else:
+            segments = []
+            if start_ts < cov_start: segments.append((start_ts, cov_start - 1))
+            if end_ts > cov_end: segments.append((cov_end + 1, end_ts))
+
+        fresh, failed = [], False
+        for seg_start, seg_end in segments:
+            self.stats["terminal_calls"] += 1
+            rates = download(datetime.fromtimestamp(seg_start), datetime.fromtimestamp(seg_end))
+            if rates is None:
+                failed = True # Terminal error (not just an empty weekend)
+            elif len(rates):
+                fresh.append(Bars.from_rates(rates))
+
+        terminal_bars = sum(len(b) for b in fresh)
+        if failed:
+            return None, {"disk_bars": 0, "terminal_bars": terminal_bars, "segments": len(segments), "failed": True}
+        if not segments:
+            bars = cached
+        else:
+            # Fresh bars go first so they win over stale copies of the same timestamp
+            parts = fresh + ([cached] if cached is not None else [])
+            if not parts:
+                return None, {"disk_bars": 0, "terminal_bars": 0, "segments": len(segments)}
+            times = np.concatenate([b.columns["time"] for b in parts])
+            _, keep = np.unique(times, return_index=True)
+            merged = {c: np.concatenate([b.columns[c] for b in parts])[keep] for c in BAR_COLUMNS}
+
+            new_start = start_ts if cached is None else min(start_ts, cov_start)
+            new_end = min(end_ts if cached is None else max(end_ts, cov_end), safe_ts)
+            try:
+                bars = self.store.write(symbol, tf_str, merged, new_start, max(new_end, new_start - 1))
+            except Exception as e:
+                print(f"   ⚠️ History Cache Write Failed ({symbol} {tf_str}): {e}")
+                bars = Bars(merged)
+
+        window = bars.slice_time(start_ts, end_ts)
+        if not len(window): return None, {"disk_bars": 0, "terminal_bars": terminal_bars, "segments": len(segments)}
+
+        disk_bars = max(len(window) - terminal_bars, 0)
+        if not segments: self.stats["full_hits"] += 1
+        self.stats["disk_bars"] += disk_bars
+        self.stats["terminal_bars"] += terminal_bars
+        return window, {"disk_bars": disk_bars, "terminal_bars": terminal_bars, "segments": len(segments)}
+
+    def summary(self):
+        s = self.stats
+        total = s["disk_bars"] + s["terminal_bars"]
+        saved = (s["disk_bars"] / total * 100) if total else 0
+        return (f"💾 History Cache: {s['full_hits']}/{s['requests']} full hits | "
+                f"{s['disk_bars']} bars from disk, {s['terminal_bars']} from terminal "
+                f"({s['terminal_calls']} calls) | {saved:.1f}% terminal I/O saved")
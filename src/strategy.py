@@ -1,6 +1,9 @@
 import pandas as pd
 import ta 
 import numpy as np
+from collections import defaultdict
+from src import indicators
+from src.indicators import IndicatorEngine
 
 # ==============================================================================
 # ---- DARWIN STRATEGY ENGINE v5.0 (Strictness-Dynamic Edition) ----
@@ -38,6 +41,9 @@ STRATEGY_STATE = {
     }
 }
 
+# 📼 Ingredients the streaming engine reproduces exactly. Anything else needs a full 'ta' pass.
+INCREMENTAL_READY = {"EMA", "SMA", "RSI", "MACD", "ADX", "Ichi", "Donch", "Stoch", "WillR", "ROC", "TRIX"}
+
 class Strategy:
     """The Brain 🧠. Dynamic parameters based on user strictness level."""
     def __init__(self):
@@ -52,7 +58,9 @@ class Strategy:
         # Grab the specific param set for this strictness level
         p = self.state["STRICTNESS_MODES"].get(strictness, self.state["STRICTNESS_MODES"]["Medium"])
         recipe = self.state.get("ACTIVE_CONCOCTION", [])
-        df = df.copy()
+        # Shallow copy: new indicator columns stay off the caller's frame, but the OHLC
+        # columns (possibly read-only memory maps) are shared rather than duplicated.
+        df = df.copy(deep=False)
         
         # 🛡️ Foundation: ATR for SL/TP math
         df['ATR'] = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], p['ATR_PERIOD']).average_true_range()
@@ -100,22 +108,35 @@ class Strategy:
             
         return df
 
-    def analyze_backtest(self, df, strictness):
-        """Confluence voting with dynamic strictness thresholds."""
-        if df.empty or len(df) < 5: return None, None, None, None
-        
-        # Pass strictness down to calc_indicators so periods shift
-        df = self.calc_indicators(df, strictness)
-        c, prev = df.iloc[-1], df.iloc[-2]
-        
+    def build_indicator_engine(self, strictness, history=500):
+        """
+        📼 Streaming twin of calc_indicators (same column names, same values).
+        Returns None when the recipe has an ingredient without an incremental form.
+        """
         p = self.state["STRICTNESS_MODES"].get(strictness, self.state["STRICTNESS_MODES"]["Medium"])
-        recipe = self.state.get("ACTIVE_CONCOCTION", [])
-        
-        buy_v, sell_v = 0, 0
-        total = len(recipe)
-        if total == 0: return None, None, None, None
+        recipe = list(self.state.get("ACTIVE_CONCOCTION", []))
+        if not set(recipe) <= INCREMENTAL_READY: return None
+
+        def build():
+            stack = [indicators.ATR(p['ATR_PERIOD'], 'ATR')]
+            if "EMA" in recipe: stack += [indicators.EMA(p['EMA_FAST'], 'EMA_F'), indicators.EMA(p['EMA_SLOW'], 'EMA_S')]
+            if "SMA" in recipe: stack.append(indicators.SMA(p['SMA_PERIOD'], 'SMA'))
+            if "RSI" in recipe: stack.append(indicators.RSI(p['RSI_PERIOD'], 'RSI'))
+            if "MACD" in recipe: stack.append(indicators.MACD(p['MACD_F'], p['MACD_S'], p['MACD_SIG'], 'MACD', 'MACD_S'))
+            if "ADX" in recipe: stack.append(indicators.ADX(p['RSI_PERIOD'], 'ADX'))
+            if "Ichi" in recipe: stack.append(indicators.Ichimoku('ISA', 'ISB'))
+            if "Donch" in recipe: stack.append(indicators.Donchian(p['DONCHIAN'], 'DCU', 'DCL'))
+            if "Stoch" in recipe: stack.append(indicators.Stochastic(p['STOCH_K'], p['STOCH_D'], 'STOK'))
+            if "WillR" in recipe: stack.append(indicators.WilliamsR(p['WILLR_PERIOD'], 'WILLR'))
+            if "ROC" in recipe: stack.append(indicators.ROC(p['ROC_PERIOD'], 'ROC'))
+            if "TRIX" in recipe: stack.append(indicators.TRIX(p['TRIX_PERIOD'], 'TRIX'))
+            return stack
 
-        # 🗳️ VOTING BOOTH
+        return IndicatorEngine(build, history)
+
+    def cast_votes(self, c, prev, p, recipe):
+        """🗳️ VOTING BOOTH for one bar. c/prev are the current and previous indicator rows."""
+        buy_v, sell_v = 0, 0
         if "EMA" in recipe:
             if c['EMA_F'] > c['EMA_S']: buy_v += 1
             if c['EMA_F'] < c['EMA_S']: sell_v += 1
@@ -164,6 +185,24 @@ class Strategy:
             if c['close'] > c['KCU']: buy_v += 1
             if c['close'] < c['KCL']: sell_v += 1
 
+        return buy_v, sell_v
+
+    def analyze_backtest(self, df, strictness):
+        """Confluence voting with dynamic strictness thresholds."""
+        if df.empty or len(df) < 5: return None, None, None, None
+        
+        # Pass strictness down to calc_indicators so periods shift
+        df = self.calc_indicators(df, strictness)
+        c, prev = df.iloc[-1], df.iloc[-2]
+        
+        p = self.state["STRICTNESS_MODES"].get(strictness, self.state["STRICTNESS_MODES"]["Medium"])
+        recipe = self.state.get("ACTIVE_CONCOCTION", [])
+        
+        total = len(recipe)
+        if total == 0: return None, None, None, None
+
+        buy_v, sell_v = self.cast_votes(c, prev, p, recipe)
+
         # ⚖️ CONFLUENCE THRESHOLD (Combined with dynamic params)
         # Low: 40% ingredients | Medium: 70% | High: 90%
         confluence_thresh = {"Low": 0.4, "Medium": 0.7, "High": 0.9}[strictness]
@@ -178,7 +217,142 @@ class Strategy:
         # Immediate float conversion for serialization safety
         if buy_ok: 
             return 'BUY', float(c['close'] - dist), float(c['close'] + (dist * p['RR'])), self.name
-        if sell_ok: 
+        if sell_ok:
             return 'SELL', float(c['close'] + dist), float(c['close'] - (dist * p['RR'])), self.name
-        
-        return None, None, None, None
\ No newline at end of file
+
+        return None, None, None, None
+
+    def analyze_backtest_vectorized(self, df, strictness):
+        """
+        ⚡ Same voting booth as analyze_backtest, but for EVERY bar at once.
+        Indicators are computed a single time over the full frame, then each vote
+        becomes a NumPy comparison. Returns (signals, sl, tp) arrays where
+        signals is +1 for BUY, -1 for SELL and 0 for no trade.
+        """
+        n = len(df)
+        signals = np.zeros(n, dtype=np.int8)
+        sl = np.full(n, np.nan)
+        tp = np.full(n, np.nan)
+        if df.empty or n < 5: return signals, sl, tp
+
+        df = self.calc_indicators(df, strictness)
+        p = self.state["STRICTNESS_MODES"].get(strictness, self.state["STRICTNESS_MODES"]["Medium"])
+        recipe = self.state.get("ACTIVE_CONCOCTION", [])
+
+        total = len(recipe)
+        if total == 0: return signals, sl, tp
+
+        col = lambda name: df[name].to_numpy(dtype=float)
+        prev = lambda name: np.concatenate(([np.nan], col(name)[:-1]))
+        close = col('close')
+        buy_v = np.zeros(n, dtype=np.int32)
+        sell_v = np.zeros(n, dtype=np.int32)
+
+        # 🗳️ VOTING BOOTH (Column-wise)
+        if "EMA" in recipe:
+            buy_v += col('EMA_F') > col('EMA_S')
+            sell_v += col('EMA_F') < col('EMA_S')
+        if "SMA" in recipe:
+            buy_v += close > col('SMA')
+            sell_v += close < col('SMA')
+        if "RSI" in recipe:
+            buy_v += col('RSI') < p['RSI_LOW']
+            sell_v += col('RSI') > p['RSI_HIGH']
+        if "MACD" in recipe:
+            buy_v += col('MACD') > col('MACD_S')
+            sell_v += col('MACD') < col('MACD_S')
+        if "Bol" in recipe:
+            buy_v += close > col('BBU')
+            sell_v += close < col('BBL')
+        if "ADX" in recipe:
+            adx_ok = col('ADX') > p['ADX_THRESHOLD']
+            buy_v += adx_ok
+            sell_v += adx_ok
+        if "SAR" in recipe:
+            buy_v += col('SAR') < close
+            sell_v += col('SAR') > close
+        if "Ichi" in recipe:
+            buy_v += (close > col('ISA')) & (close > col('ISB'))
+            sell_v += (close < col('ISA')) & (close < col('ISB'))
+        if "Donch" in recipe:
+            buy_v += close > prev('DCU')
+            sell_v += close < prev('DCL')
+        if "Stoch" in recipe:
+            buy_v += col('STOK') < 20
+            sell_v += col('STOK') > 80
+        if "CCI" in recipe:
+            buy_v += col('CCI') < -100
+            sell_v += col('CCI') > 100
+        if "MFI" in recipe:
+            buy_v += col('MFI') < 20
+            sell_v += col('MFI') > 80
+        if "WillR" in recipe:
+            buy_v += col('WILLR') < -80
+            sell_v += col('WILLR') > -20
+        if "ROC" in recipe:
+            buy_v += col('ROC') > 0
+            sell_v += col('ROC') < 0
+        if "TRIX" in recipe:
+            buy_v += col('TRIX') > 0
+            sell_v += col('TRIX') < 0
+        if "Kelt" in recipe:
+            buy_v += close > col('KCU')
+            sell_v += close < col('KCL')
+
+        # ⚖️ CONFLUENCE THRESHOLD (Identical to the single-bar booth)
+        confluence_thresh = {"Low": 0.4, "Medium": 0.7, "High": 0.9}[strictness]
+        atr = col('ATR')
+        has_atr = ~np.isnan(atr)
+        buy_ok = (buy_v >= total * confluence_thresh) & has_atr
+        sell_ok = (sell_v >= total * confluence_thresh) & has_atr & ~buy_ok
+
+        # 💰 EXECUTION (BUY wins ties, just like the early return above)
+        dist = atr * p['ATR_MULT']
+        signals[buy_ok] = 1
+        signals[sell_ok] = -1
+        sl[buy_ok] = (close - dist)[buy_ok]
+        tp[buy_ok] = (close + (dist * p['RR']))[buy_ok]
+        sl[sell_ok] = (close + dist)[sell_ok]
+        tp[sell_ok] = (close - (dist * p['RR']))[sell_ok]
+
+        return signals, sl, tp
+
+    def analyze_backtest_incremental(self, df, strictness):
+        """
+        📼 Same output as analyze_backtest_vectorized, but produced the way the live loop
+        sees the market: one bar at a time through the streaming IndicatorEngine.
+        Recipes with non-streamable ingredients fall back to the vectorized pass.
+        """
+        engine = self.build_indicator_engine(strictness, history=2)
+        if engine is None: return self.analyze_backtest_vectorized(df, strictness)
+
+        n = len(df)
+        signals = np.zeros(n, dtype=np.int8)
+        sl = np.full(n, np.nan)
+        tp = np.full(n, np.nan)
+        if df.empty or n < 5: return signals, sl, tp
+
+        p = self.state["STRICTNESS_MODES"].get(strictness, self.state["STRICTNESS_MODES"]["Medium"])
+        recipe = self.state.get("ACTIVE_CONCOCTION", [])
+        total = len(recipe)
+        if total == 0: return signals, sl, tp
+
+        confluence_thresh = {"Low": 0.4, "Medium": 0.7, "High": 0.9}[strictness]
+        times = df['time'].to_numpy()
+        highs, lows, closes = (df[c].to_numpy(dtype=float) for c in ('high', 'low', 'close'))
+
+        prev = defaultdict(lambda: np.nan) # Bar 0 has no previous row
+        for i in range(n):
+            c = engine.update(times[i], float(highs[i]), float(lows[i]), float(closes[i]))
+            buy_v, sell_v = self.cast_votes(c, prev, p, recipe)
+            prev = c
+
+            atr = c['ATR']
+            if atr != atr: continue
+            dist = atr * p['ATR_MULT']
+            if buy_v >= total * confluence_thresh:
+                signals[i], sl[i], tp[i] = 1, c['close'] - dist, c['close'] + (dist * p['RR'])
+            elif sell_v >= total * confluence_thresh:
+                signals[i], sl[i], tp[i] = -1, c['close'] + dist, c['close'] - (dist * p['RR'])
+
+        return signals, sl, tp
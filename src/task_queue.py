@@ -0,0 +1,237 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from datetime import datetime
+from src.cloud import CloudManager, TASK_COLUMNS, lease_stamp
+from config import TASK_QUEUE_BACKEND, TASK_QUEUE_DB, TASK_POLL_MIN, TASK_POLL_MAX, TASK_LEASE_SECONDS, TASK_CLAIM_SETTLE
+
+def default_worker_id():
+    """host-pid: unique per worker process, readable in the 'Tasks' sheet."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class Heartbeat:
+    """
+    💓 Renews a claimed task's lease from a background thread while the mission runs.
+    If the lease was lost (we stalled past expiry and another worker re-queued it),
+    `lost` flips and renewing stops; the final status write will then refuse to clobber the new owner.
+    The expiry is also tracked locally: if renewals keep failing (backend unreachable) until the
+    lease runs out, the task may already be someone else's, so `lost` reads True from then on too.
+    The worker checks it before every write that would touch the task's batch.
+    """
+    def __init__(self, queue, task_id, interval, lease):
+        self._lost = False
+        self.lease = lease
+        # The claim was stamped up to TASK_CLAIM_SETTLE seconds ago: count from then
+        self.expires = time.monotonic() + lease - TASK_CLAIM_SETTLE
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(queue, task_id, interval), name="lease-heartbeat", daemon=True)
+        self.thread.start()
+
+    @property
+    def lost(self):
+        return self._lost or time.monotonic() > self.expires
+
+    def _run(self, queue, task_id, interval):
+        while not self._stop.wait(interval):
+            sent = time.monotonic() # The new expiry counts from before the write, not after
+            renewed = queue.renew(task_id)
+            if renewed is False:
+                print(f"⚠️ Lost the lease on task {task_id}. Another worker may pick it up.")
+                self._lost = True
+                return
+            if renewed: self.expires = sent + self.lease
+
+    def stop(self):
+        self._stop.set()
+        self.thread.join(timeout=5)
+
+class TaskQueue(ABC):
+    """
+    The Dispatcher 📮. Missions in (app.py), missions out (worker.py), whatever the backend.
+    A task is (task_id, task_dict) with the 'Tasks' column names as keys.
+    Claims are leases: the holder must renew them (heartbeat) or the task goes back to PENDING
+    once TASK_LEASE_SECONDS pass, so a crashed VM never strands a mission.
+    Backends implement submit, claim, _write_status and renew.
+    """
+    def __init__(self, worker_id=None):
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_delay = TASK_POLL_MIN
+        self.heartbeats = {} # task_id -> Heartbeat
+
+    @abstractmethod
+    def submit(self, pairs, tf, recipe, strictness, start_date, end_date, engine="legacy"):
+        """Queues a mission. Returns (Success, ErrorMsg)."""
+
+    @abstractmethod
+    def claim(self):
+        """Atomically takes the oldest PENDING task for this worker. Returns (task_id, task) or None."""
+
+    def set_status(self, task_id, status):
+        """Final status. Stops the heartbeat first; only lands while this worker still holds the lease."""
+        beat = self.heartbeats.pop(task_id, None)
+        if beat: beat.stop()
+        self._write_status(task_id, status)
+
+    @abstractmethod
+    def _write_status(self, task_id, status):
+        """Backend write behind set_status, guarded by lease ownership."""
+
+    @abstractmethod
+    def renew(self, task_id):
+        """True = lease extended, False = no longer ours, None = backend unreachable (retry later)."""
+
+    def heartbeat(self, task_id):
+        beat = Heartbeat(self, task_id, max(1, TASK_LEASE_SECONDS / 3), TASK_LEASE_SECONDS)
+        self.heartbeats[task_id] = beat
+        return beat
+
+    def wait(self):
+        """Blocks until a task is claimed. Idle polls back off from TASK_POLL_MIN up to TASK_POLL_MAX."""
+        while True:
+            job = self.claim()
+            if job:
+                self.poll_delay = TASK_POLL_MIN
+                return job
+            time.sleep(self.poll_delay)
+            self.poll_delay = min(self.poll_delay * 2, TASK_POLL_MAX)
+
+class SheetsTaskQueue(TaskQueue):
+    """
+    The 'Tasks' tab as a queue 📑. Everything above the high-water mark is finished, so each
+    poll reads only the rows from there down: new missions plus the leased ones still in flight,
+    whose expiry is checked in the same read.
+    """
+    def __init__(self, cloud, worker_id=None):
+        super().__init__(worker_id)
+        self.cloud = cloud
+        self.high_water = 2 # First row that is PENDING or under lease (row 1 = headers)
+
+    def submit(self, pairs, tf, recipe, strictness, start_date, end_date, engine="legacy"):
+        return self.cloud.request_task(pairs, tf, recipe, strictness, start_date, end_date, engine=engine)
+
+    def claim(self):
+        now = lease_stamp()
+        for row_idx, task in self.cloud.get_task_rows(self.high_water):
+            status, lease = task['Status'], task['Lease Until']
+            if status == 'RUNNING' and lease and lease < now:
+                print(f"⏰ Lease on row {row_idx} ({task['Worker']}) expired. Re-queueing...")
+                if self.cloud.requeue_task(row_idx, task['Worker'], lease): status = 'PENDING'
+            if status == 'PENDING' and self.cloud.claim_task(row_idx, self.worker_id, TASK_LEASE_SECONDS):
+                task['Status'], task['Worker'] = 'RUNNING', self.worker_id
+                return row_idx, task
+            # Only a solid block of finished rows moves the mark (leased rows may still come back).
+            # RUNNING rows without a lease predate leasing and can't be recovered, so they count as done.
+            live = status == 'PENDING' or (status == 'RUNNING' and lease)
+            if not live and row_idx == self.high_water:
+                self.high_water += 1
+        return None
+
+    def _write_status(self, task_id, status):
+        self.cloud.finish_task(task_id, self.worker_id, status)
+
+    def renew(self, task_id):
+        return self.cloud.renew_lease(task_id, self.worker_id, TASK_LEASE_SECONDS)
+
+class SQLiteTaskQueue(TaskQueue):
+    """
+    Local queue in one SQLite file 🗃️ (dev box / tests, no Google needed).
+    Claims (and the expired-lease sweep) run inside BEGIN IMMEDIATE, so any number of local
+    workers can share the file. The (status, id) index means a poll only touches live rows.
+    """
+    FIELDS = ["timestamp", "status", "pairs", "tf", "recipe", "strictness", "start_date", "end_date", "engine", "worker", "lease_until"]
+
+    def __init__(self, path, worker_id=None):
+        super().__init__(worker_id)
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                + ", ".join(f"{f} TEXT" for f in self.FIELDS) + ")"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id)")
+            # Files made before leasing existed
+            have = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+            for f in self.FIELDS:
+                if f not in have: conn.execute(f"ALTER TABLE tasks ADD COLUMN {f} TEXT DEFAULT ''")
+
+    def _connect(self):
+        # One short-lived connection per call: Streamlit reruns scripts on other threads
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def submit(self, pairs, tf, recipe, strictness, start_date, end_date, engine="legacy"):
+        try:
+            values = [
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "PENDING", ",".join(pairs), tf,
+                "+".join(recipe), strictness, start_date, end_date, engine, "", ""
+            ]
+            with closing(self._connect()) as conn:
+                conn.execute(
+                    f"INSERT INTO tasks ({', '.join(self.FIELDS)}) VALUES ({', '.join('?' * len(self.FIELDS))})",
+                    values
+                )
+            return True, ""
+        except Exception as e:
+            return False, str(e)
+
+    def claim(self):
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("BEGIN IMMEDIATE") # Write lock: no other worker can claim in between
+                expired = conn.execute(
+                    "UPDATE tasks SET status = 'PENDING', worker = '', lease_until = '' "
+                    "WHERE status = 'RUNNING' AND lease_until != '' AND lease_until < ?",
+                    (lease_stamp(),)
+                ).rowcount
+                if expired: print(f"⏰ Re-queued {expired} task(s) with expired leases.")
+                row = conn.execute(
+                    f"SELECT id, {', '.join(self.FIELDS)} FROM tasks WHERE status = 'PENDING' ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                lease = lease_stamp(TASK_LEASE_SECONDS)
+                conn.execute(
+                    "UPDATE tasks SET status = 'RUNNING', worker = ?, lease_until = ? WHERE id = ?",
+                    (self.worker_id, lease, row[0])
+                )
+                conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"⚠️ Task queue error: {e}")
+            return None
+
+        task_id = row[0]
+        task = dict(zip(TASK_COLUMNS, row[1:]))
+        task['Status'], task['Worker'], task['Lease Until'] = 'RUNNING', self.worker_id, lease
+        return task_id, task
+
+    def _write_status(self, task_id, status):
+        try:
+            with closing(self._connect()) as conn:
+                done = conn.execute(
+                    "UPDATE tasks SET status = ?, lease_until = '' WHERE id = ? AND worker = ?",
+                    (status, task_id, self.worker_id)
+                ).rowcount
+            if not done: print(f"⚠️ Task {task_id} now belongs to another worker. Not overwriting its status.")
+        except sqlite3.Error as e:
+            print(f"⚠️ Task queue error: {e}")
+
+    def renew(self, task_id):
+        try:
+            with closing(self._connect()) as conn:
+                return conn.execute(
+                    "UPDATE tasks SET lease_until = ? WHERE id = ? AND status = 'RUNNING' AND worker = ?",
+                    (lease_stamp(TASK_LEASE_SECONDS), task_id, self.worker_id)
+                ).rowcount == 1
+        except sqlite3.Error as e:
+            print(f"⚠️ Task queue error: {e}")
+            return None
+
+def make_task_queue(cloud=None, worker_id=None):
+    """The queue picked by TASK_QUEUE_BACKEND ('sheets' by default)."""
+    if TASK_QUEUE_BACKEND == "sqlite":
+        return SQLiteTaskQueue(TASK_QUEUE_DB, worker_id)
+    return SheetsTaskQueue(cloud or CloudManager(), worker_id)
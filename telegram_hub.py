@@ -0,0 +1,172 @@
+import queue
+import threading
+import time
+import requests
+from multiprocessing.connection import Listener
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_URL, TELEGRAM_HUB_ADDRESS, TELEGRAM_POLL_TIMEOUT, TELEGRAM_SEND_INTERVAL
+
+def parse_address(address):
+    """'127.0.0.1:8765' -> ('127.0.0.1', 8765)"""
+    host, _, port = str(address).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+class TelegramHub:
+    """
+    The Switchboard ☎️. One process per host owns the bot token:
+    - it long-polls getUpdates ONCE and routes each command to the bot it names
+      (/assemble goes to every connected bot, /darwin_pause only to Darwin),
+    - every bot's outbound messages land in ONE send queue, paced at TELEGRAM_SEND_INTERVAL.
+    Bots talk to it over a local multiprocessing connection (authenticated with the token).
+    Wire format, one dict per message:
+      bot -> hub: {"op": "hello", "identity": "darwin"} first, then {"op": "send", "text": "..."}
+      hub -> bot: {"op": "command", "cmd": "pause"}
+    """
+    def __init__(self, address=TELEGRAM_HUB_ADDRESS, api_url=TELEGRAM_API_URL,
+                 poll_timeout=TELEGRAM_POLL_TIMEOUT, send_interval=TELEGRAM_SEND_INTERVAL):
+        self.address = parse_address(address)
+        self.base_url = f"{api_url}/bot{TELEGRAM_BOT_TOKEN}"
+        self.chat_id = str(TELEGRAM_CHAT_ID)
+        self.poll_timeout = poll_timeout
+        self.send_interval = send_interval
+        self.last_update_id = 0
+        self.clients = {}   # identity -> {conn: send lock}
+        self.clients_lock = threading.Lock()
+        self.outbox = queue.Queue()
+        self.stopping = threading.Event()
+        self.stats = {"polls": 0, "routed": 0, "sent": 0, "failed": 0}
+
+    def serve_forever(self):
+        listener = Listener(self.address, authkey=str(TELEGRAM_BOT_TOKEN).encode())
+        print(f"☎️ Telegram Hub listening on {self.address[0]}:{self.address[1]}")
+        for target, name in ((self._poll, "hub-poll"), (self._deliver, "hub-send")):
+            threading.Thread(target=target, name=name, daemon=True).start()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    # Wrong authkey / half-open socket: refuse that one, keep serving
+                    print(f"   ⚠️ Rejected a connection: {e}")
+                    continue
+                threading.Thread(target=self._serve_client, args=(conn,), name="hub-client", daemon=True).start()
+        finally:
+            listener.close()
+
+    def stop(self):
+        self.stopping.set()
+
+    # --- Bots ---
+
+    def _serve_client(self, conn):
+        identity = None
+        try:
+            hello = conn.recv()
+            identity = str(hello.get("identity", "")).lower()
+            if hello.get("op") != "hello" or not identity:
+                conn.close()
+                return
+            with self.clients_lock:
+                self.clients.setdefault(identity, {})[conn] = threading.Lock()
+            print(f"   🔌 {identity} connected.")
+            while True:
+                msg = conn.recv()
+                if msg.get("op") == "send": self.outbox.put(msg["text"])
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            print(f"   ⚠️ Client {identity} error: {e}")
+        finally:
+            with self.clients_lock:
+                conns = self.clients.get(identity)
+                if conns is not None:
+                    conns.pop(conn, None)
+                    if not conns: del self.clients[identity]
+            conn.close()
+            if identity: print(f"   🔌 {identity} disconnected.")
+
+    def _push(self, identity, cmd):
+        with self.clients_lock:
+            conns = list(self.clients.get(identity, {}).items())
+        if not conns:
+            print(f"   📭 '{cmd}' for {identity}, but it isn't connected. Dropped.")
+            return
+        for conn, lock in conns:
+            try:
+                with lock:
+                    conn.send({"op": "command", "cmd": cmd})
+                self.stats["routed"] += 1
+            except Exception:
+                pass # Its reader thread notices the dead socket and unregisters it
+
+    def route(self, update):
+        """Same rules the bots used to apply on their own, decided once for all of them."""
+        if "message" not in update or "text" not in update["message"]:
+            return
+        msg = update["message"]["text"].strip().lower()
+        if str(update["message"]["from"]["id"]) != self.chat_id:
+            return
+        parts = msg.split()
+        if not parts: return
+        base_cmd = parts[0]
+
+        with self.clients_lock:
+            identities = list(self.clients)
+
+        # 1. GLOBAL CALL
+        if base_cmd == "/assemble":
+            for identity in identities:
+                self._push(identity, "status")
+            return
+
+        # 2. TARGETED CALL (e.g. /darwin_pause -> 'pause' for darwin). Longest name wins.
+        for identity in sorted(identities, key=len, reverse=True):
+            prefix = f"/{identity}_"
+            if base_cmd.startswith(prefix):
+                self._push(identity, base_cmd[len(prefix):])
+                return
+
+    # --- Telegram ---
+
+    def _poll(self):
+        session = requests.Session()
+        while not self.stopping.is_set():
+            try:
+                params = {"offset": self.last_update_id + 1, "timeout": self.poll_timeout}
+                response = session.get(f"{self.base_url}/getUpdates", params=params, timeout=self.poll_timeout + 10)
+                self.stats["polls"] += 1
+                data = response.json()
+                if not data.get("ok"):
+                    print(f"   ⚠️ getUpdates refused: {data.get('description')}")
+                    self.stopping.wait(5)
+                    continue
+                for update in data.get("result", []):
+                    self.last_update_id = update["update_id"]
+                    self.route(update)
+            except Exception as e:
+                self.stopping.wait(5)
+
+    def _deliver(self):
+        session = requests.Session()
+        while True:
+            text = self.outbox.get()
+            for attempt in range(3):
+                try:
+                    payload = {"chat_id": self.chat_id, "text": text}
+                    response = session.post(f"{self.base_url}/sendMessage", json=payload, timeout=10)
+                    if response.status_code == 429:
+                        # Telegram tells us how long to back off
+                        retry_after = response.json().get("parameters", {}).get("retry_after", 5)
+                        time.sleep(retry_after)
+                        continue
+                    response.raise_for_status()
+                    self.stats["sent"] += 1
+                    break
+                except Exception as e:
+                    print(f"   ⚠️ Telegram send failed: {e}")
+                    time.sleep(self.send_interval)
+            else:
+                self.stats["failed"] += 1
+            time.sleep(self.send_interval) # Pacing: one message per interval for the whole suite
+
+if __name__ == "__main__":
+    TelegramHub().serve_forever()
@@ -1,59 +1,111 @@
-import time
-from src.backtester import BacktestEngine
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.backtester import BacktestEngine, ENGINE_MODES, DEFAULT_ENGINE, simulate_pair
 from src.cloud import CloudManager
+from src.task_queue import make_task_queue
+from config import WORKER_PROCESSES, TASK_QUEUE_BACKEND
 from datetime import datetime
 
-class DummyProgress:
-    def progress(self, val): pass
+def run_pairs(engine, pool, batch_id, pairs, tf, start_dt, end_dt, recipe, strictness, sim_engine, heartbeat=None):
+    """
+    🏭 The Assembly Line.
+    MT5 only talks to this process, so history is fetched here (once per pair) and each
+    Bars handle is passed to the pool as soon as it lands. Cached history travels as a
+    file reference, so every core maps the same bytes instead of receiving a pickled copy.
+    Results are collected in pair order, so the batch sheet looks the same no matter
+    which core finishes first.
+    Nothing is published once the task's lease is lost (another worker may be redoing it):
+    the remaining jobs are cancelled and False is returned.
+    """
+    jobs = []
+    for pair in pairs:
+        print(f"📈 Backtesting {pair} ({sim_engine})...")
+        bars = engine.fetch_history(pair, tf, start_dt, end_dt)
+        fetch = engine.broker.last_fetch
+        if fetch and fetch.get('failed'):
+            print(f"   ⚠️ MT5 failed on part of the range for {pair}. Skipping (no partial backtests).")
+        elif fetch and fetch['disk_bars']:
+            print(f"   💾 Cache hit: {fetch['disk_bars']} bars from disk, {fetch['terminal_bars']} from MT5")
+        if bars is None:
+            jobs.append((pair, None))
+            continue
+
+        job = (batch_id, pair, bars, recipe, strictness, sim_engine)
+        jobs.append((pair, pool.submit(simulate_pair, job) if pool else job))
+
+    for i, (pair, job) in enumerate(jobs):
+        if job is None:
+            print(f"❌ {pair}: Not enough data.")
+            continue
+        _, trades = job.result() if pool else simulate_pair(job)
+        if heartbeat and heartbeat.lost:
+            print(f"⚠️ Lease lost: not publishing {pair} or anything after it.")
+            for _, rest in jobs[i + 1:]:
+                if pool and rest is not None: rest.cancel()
+            return False
+        print(engine.publish_results(batch_id, pair, trades))
+    return True
 
 def run_worker():
     """The Heavy Lifter 🏋️. Runs on the Windows VM with MT5."""
     print("🚀 Worker Online. Waiting for missions from Streamlit Cloud...")
+    print(f"   🏭 Simulation Cores: {WORKER_PROCESSES}")
     engine = BacktestEngine()
     cloud = CloudManager()
+    queue = make_task_queue(cloud)
+    print(f"   🪪 Worker ID: {queue.worker_id} | Queue: {TASK_QUEUE_BACKEND}")
+    make_pool = lambda: ProcessPoolExecutor(max_workers=WORKER_PROCESSES) if WORKER_PROCESSES > 1 else None
+    pool = make_pool()
     
     while True:
-        tasks = cloud.get_pending_tasks()
+        # 📮 Claimed = already RUNNING under our worker id; idle polls back off on their own
+        task_id, task = queue.wait()
+        print(f"🎯 Mission Received: {task['Pairs']} on {task['TF']}")
+        # 💓 Keep the lease alive; if this VM dies the mission is re-queued for another worker
+        heartbeat = queue.heartbeat(task_id)
         
-        if not tasks:
-            time.sleep(10)
-            continue
+        try:
+            success, msg = engine.startup()
+            if not success:
+                print(f"❌ MT5 Failed: {msg}")
+                queue.set_status(task_id, f"ERROR: {msg}")
+                continue
+                
+            pairs = task['Pairs'].split(",")
+            tf = task['TF']
+            recipe = task['Recipe'].split("+")
+            strictness = task['Strictness']
+            start_dt = datetime.strptime(str(task['Start']), "%Y-%m-%d")
+            end_dt = datetime.strptime(str(task['End']), "%Y-%m-%d")
+            # Older 'Tasks' rows have no Engine column -> fall back to the legacy loop
+            sim_engine = str(task.get('Engine') or DEFAULT_ENGINE).strip().lower()
+            if sim_engine not in ENGINE_MODES: sim_engine = DEFAULT_ENGINE
             
-        for row_idx, task in tasks:
-            print(f"🎯 Mission Received: {task['Pairs']} on {task['TF']}")
-            cloud.update_task_status(row_idx, "RUNNING")
+            batch_id = engine.init_batch(pairs, tf, recipe, strictness, start_dt, end_dt)
             
-            try:
-                success, msg = engine.startup()
-                if not success:
-                    print(f"❌ MT5 Failed: {msg}")
-                    cloud.update_task_status(row_idx, f"ERROR: {msg}")
-                    continue
-                
-                pairs = task['Pairs'].split(",")
-                tf = task['TF']
-                recipe = task['Recipe'].split("+")
-                strictness = task['Strictness']
-                start_dt = datetime.strptime(str(task['Start']), "%Y-%m-%d")
-                end_dt = datetime.strptime(str(task['End']), "%Y-%m-%d")
-                
-                batch_id = engine.init_batch(pairs, tf, recipe, strictness, start_dt, end_dt)
-                
-                for pair in pairs:
-                    print(f"📈 Backtesting {pair}...")
-                    engine.run_show(batch_id, pair, tf, start_dt, end_dt, recipe, strictness, DummyProgress())
-                
-                engine.finalize_show(batch_id)
+            finished = run_pairs(engine, pool, batch_id, pairs, tf, start_dt, end_dt, recipe, strictness, sim_engine, heartbeat)
+            if not finished or heartbeat.lost:
+                # The task may already be someone else's: leave the batch unfinished and the status alone
+                print(f"⚠️ Lease lost on Batch {batch_id}. Dropping the mission without finalizing it.")
+                engine.batch_stats.pop(batch_id, None)
+                queue.heartbeats.pop(task_id, None)
                 engine.shutdown()
-                
-                cloud.update_task_status(row_idx, f"COMPLETED (Batch {batch_id})")
-                print(f"✅ Mission Accomplished: Batch {batch_id}")
-                
-            except Exception as e:
-                print(f"🔥 Critical Failure: {e}")
-                cloud.update_task_status(row_idx, f"FAILED: {e}")
-        
-        time.sleep(5)
+                continue
+            
+            engine.finalize_show(batch_id)
+            if engine.broker.cache: print(f"   {engine.broker.cache.summary()}")
+            engine.shutdown()
+            
+            queue.set_status(task_id, f"COMPLETED (Batch {batch_id})")
+            print(f"✅ Mission Accomplished: Batch {batch_id}")
+            
+        except Exception as e:
+            print(f"🔥 Critical Failure: {e}")
+            queue.set_status(task_id, f"FAILED: {e}")
+            # A dead child poisons the whole pool -> rebuild it for the next mission
+            if isinstance(e, BrokenProcessPool): pool = make_pool()
+        finally:
+            heartbeat.stop()
 
 if __name__ == "__main__":
-    run_worker()
\ No newline at end of file
+    run_worker()